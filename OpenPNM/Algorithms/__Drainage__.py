@@ -372,6 +372,14 @@ class Drainage(GenericAlgorithm):
         inv_pressures : array_like
             A list of capillary pressures to apply. List should contain
             increasing and unique values.
+
+        Notes
+        -----
+        The pressure at which each pore and throat is invaded is found
+        exactly in a single sweep through the sorted entry pressures, so the
+        run time does not depend on the number of points.  The points set
+        the highest pressure that is applied and the values reported by
+        ``get_drainage_data``.
         """
         # If no invasion points are given then generate some
         if inv_pressures is None:
@@ -395,14 +403,21 @@ class Drainage(GenericAlgorithm):
             if sp.sum(self['pore.outlets']) == 0:
                 raise Exception('Outlet pores have not been specified')
 
-        # Generate curve from points
-        for inv_val in self._inv_points:
-            # Apply one applied pressure and determine invaded pores
-            logger.info('Applying capillary pressure: ' + str(inv_val))
-            self._apply_percolation(inv_val)
-            if self._trapping:
-                logger.info('Checking for trapping')
-                self._check_trapping(inv_val)
+        # Find the invasion pressures up to the highest applied pressure
+        p_inv, t_inv = self._find_invasion_pressures()
+        max_p = sp.amax(self._inv_points)
+        p_inv[p_inv > max_p] = sp.inf
+        t_inv[t_inv > max_p] = sp.inf
+        self['pore.inv_Pc'] = p_inv
+        self['throat.inv_Pc'] = t_inv
+        # Set residual pores and throats, if any, to invaded
+        if sp.any(self['pore.residual']):
+            self['pore.inv_Pc'][self['pore.residual']] = 0
+        if sp.any(self['throat.residual']):
+            self['throat.inv_Pc'][self['throat.residual']] = 0
+        if self._trapping:
+            logger.info('Checking for trapping')
+            self._check_trapping()
 
         # Find invasion sequence values (to correspond with IP algorithm)
         Pinv = self['pore.inv_Pc']
@@ -410,73 +425,136 @@ class Drainage(GenericAlgorithm):
         Tinv = self['throat.inv_Pc']
         self['throat.inv_seq'] = sp.searchsorted(sp.unique(Tinv), Tinv)
 
-    def _check_trapping(self, inv_val):
+    def _check_trapping(self):
         r"""
         Determine which pores and throats are trapped by invading phase.  This
         method is called by ``run`` if 'trapping' is set to True.
+
+        Notes
+        -----
+        The trapping pressure of every pore is found in a single pass that
+        runs backwards through the distinct invasion pressures (see
+        ``_find_outlet_connection``), rather than by relabelling the defending
+        clusters at each pressure.  The invasion is found first, and locations
+        that were invaded after being trapped are then reset to uninvaded.
+
+        This differs from the earlier loop over the applied pressures, which
+        set the entry pressure of every throat between the pores of a trapped
+        cluster to 1e6 before the next pressure was applied.  Since those
+        pores include the invaded pores on the edge of the cluster, this could
+        close already invaded throats and cut off parts of the invading
+        cluster, so pores beyond them were never invaded.  These pores are now
+        invaded, and their trapping pressures change accordingly.
         """
-        # Generate a list containing boolean values for throat state
-        Tinvaded = self['throat.inv_Pc'] < sp.inf
-        # Add residual throats, if any, to list of invaded throats
-        Tinvaded = Tinvaded + self['throat.residual']
-        # Invert logic to find defending throats
-        Tdefended = ~Tinvaded
-        [pclusters, tclusters] = self._net.find_clusters2(mask=Tdefended,
-                                                          t_labels=True)
-        # See which outlet pores remain uninvaded
-        outlets = self['pore.outlets']*(self['pore.inv_Pc'] == sp.inf)
-        # Identify clusters connected to remaining outlet sites
-        def_clusters = sp.unique(pclusters[outlets])
-        temp = sp.in1d(sp.unique(pclusters), def_clusters, invert=True)
-        trapped_clusters = sp.unique(pclusters)[temp]
-        trapped_clusters = trapped_clusters[trapped_clusters >= 0]
-
-        # Find defending clusters NOT connected to the outlet pores
-        pmask = np.in1d(pclusters, trapped_clusters)
-        # Store current applied pressure in newly trapped pores
-        pinds = (self['pore.trapped'] == sp.inf) * (pmask)
-        self['pore.trapped'][pinds] = inv_val
-
-        # Find throats on the trapped defending clusters
-        tinds = self._net.find_neighbor_throats(pores=pinds,
-                                                mode='intersection')
-        self['throat.trapped'][tinds] = inv_val
-        self['throat.entry_pressure'][tinds] = 1000000
-
-    def _apply_percolation(self, inv_val):
+        inv_Pc = sp.concatenate((self['pore.inv_Pc'], self['throat.inv_Pc']))
+        levels = sp.unique(inv_Pc[sp.isfinite(inv_Pc)])
+        conns = self._net['throat.conns']
+        # Throats carry defending phase until they are invaded
+        t_time = sp.copy(self['throat.inv_Pc'])
+        # Residual throats never carry defending phase
+        t_time[self['throat.residual']] = -sp.inf
+        # Outlet pores remain active until they are invaded
+        o_time = sp.where(self['pore.outlets'], self['pore.inv_Pc'], -sp.inf)
+        step = self._find_outlet_connection(levels, t_time, o_time)
+        # Pores are trapped at the step after they last reach an outlet...
+        step = step + 1
+        # ...provided they still touch a defending throat at that step
+        t_max = sp.ones([self.Np, ])*-sp.inf
+        sp.maximum.at(t_max, conns[:, 0], t_time)
+        sp.maximum.at(t_max, conns[:, 1], t_time)
+        Ps = step < sp.size(levels)
+        Ps[Ps] = levels[step[Ps]] < t_max[Ps]
+        self['pore.trapped'] = sp.inf
+        self['pore.trapped'][Ps] = levels[step[Ps]]
+        # Throats are trapped when both their pores are trapped together
+        Pt = self['pore.trapped'][conns]
+        Ts = (Pt[:, 0] == Pt[:, 1]) * (Pt[:, 0] < sp.inf)
+        self['throat.trapped'] = sp.inf
+        self['throat.trapped'][Ts] = Pt[Ts, 0]
+        self['throat.entry_pressure'][Ts] = 1000000
+        # Trapped locations cannot be invaded afterwards
+        Ps = self['pore.inv_Pc'] > self['pore.trapped']
+        self['pore.inv_Pc'][Ps] = sp.inf
+        Ts = self['throat.inv_Pc'] > self['throat.trapped']
+        self['throat.inv_Pc'][Ts] = sp.inf
+
+    def _find_invasion_pressures(self):
         r"""
-        Determine which pores and throats are invaded at a given applied
-        capillary pressure.  This method is called by ``run``.
-        """
-        # Generate a list containing boolean values for throat state
-        Tinvaded = self['throat.entry_pressure'] <= inv_val
-        # Add residual throats, if any, to list of invaded throats
-        Tinvaded = Tinvaded + self['throat.residual']
-        # Find all pores that can be invaded at specified pressure
-        [pclusters, tclusters] = self._net.find_clusters2(mask=Tinvaded,
-                                                          t_labels=True)
-
-        # Identify clusters connected to inlet sites
-        inv_clusters = sp.unique(pclusters[self['pore.inlets']])
-        inv_clusters = inv_clusters[inv_clusters >= 0]
-
-        # Find pores on the invading clusters
-        pmask = np.in1d(pclusters, inv_clusters)
-        # Store current applied pressure in newly invaded pores
-        pinds = (self['pore.inv_Pc'] == sp.inf) * (pmask)
-        self['pore.inv_Pc'][pinds] = inv_val
-
-        # Find throats on the invading clusters
-        tmask = np.in1d(tclusters, inv_clusters)
-        # Store current applied pressure in newly invaded throats
-        tinds = (self['throat.inv_Pc'] == sp.inf) * (tmask)
-        self['throat.inv_Pc'][tinds] = inv_val
+        Find the lowest capillary pressure at which each pore and throat is
+        connected to an inlet by throats whose entry pressure is exceeded.
+        This method is called by ``run``.
 
-        # Set residual pores and throats, if any, to invaded
-        if sp.any(self['pore.residual']):
-            self['pore.inv_Pc'][self['pore.residual']] = 0
-        if sp.any(self['throat.residual']):
-            self['throat.inv_Pc'][self['throat.residual']] = 0
+        Returns
+        -------
+        A tuple containing Np and Nt long arrays of invasion pressures, with
+        ``sp.inf`` for locations that are never invaded.
+
+        Notes
+        -----
+        The throats are sorted by entry pressure once and added in that order
+        to a disjoint-set forest of pores.  When a cluster first joins one
+        containing an inlet all of its pores are invaded at the entry
+        pressure of the joining throat.  Residual throats are open from the
+        start, and no pore or throat is invaded below the first applied
+        pressure.  As with the bond percolation used previously, an inlet pore
+        is only invaded once one of its throats is open.
+        """
+        Np = self._net.num_pores()
+        Pc_min = sp.amin(self._inv_points)
+        t_entry = sp.array(self['throat.entry_pressure'], dtype=float)
+        t_entry[self['throat.residual']] = -sp.inf
+        Ts = sp.where(~sp.isnan(t_entry))[0]
+        Ts = Ts[sp.argsort(t_entry[Ts], kind='mergesort')]
+        conns = self._net['throat.conns']
+        parent = list(range(Np))
+        size = [1]*Np
+        p_next = list(range(Np))
+        inlet = self['pore.inlets'].tolist()
+        invaded = [False]*Np
+        p_inv = [sp.inf]*Np
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        def invade(r, Pc):
+            # Invade all pores of cluster r at pressure Pc
+            invaded[r] = True
+            i = r
+            while True:
+                p_inv[i] = Pc
+                i = p_next[i]
+                if i == r:
+                    break
+
+        for a, b, Pc in zip(conns[Ts, 0].tolist(), conns[Ts, 1].tolist(),
+                            t_entry[Ts].tolist()):
+            ra = find(a)
+            rb = find(b)
+            if ra == rb:
+                continue
+            if size[ra] < size[rb]:
+                ra, rb = rb, ra
+            if inlet[ra] or inlet[rb]:
+                if not invaded[ra]:
+                    invade(ra, max(Pc, Pc_min))
+                if not invaded[rb]:
+                    invade(rb, max(Pc, Pc_min))
+                inlet[ra] = True
+            parent[rb] = ra
+            size[ra] += size[rb]
+            p_next[ra], p_next[rb] = p_next[rb], p_next[ra]
+        p_inv = sp.array(p_inv, dtype=float)
+        # Throats are invaded once open if either pore reaches an inlet
+        reach = sp.where(self['pore.inlets'], -sp.inf, p_inv)
+        t_inv = sp.maximum(t_entry, sp.minimum(reach[conns[:, 0]],
+                                               reach[conns[:, 1]]))
+        # Nothing is invaded below the first applied pressure
+        t_inv = sp.maximum(t_inv, Pc_min)
+        t_inv[sp.isnan(t_entry)] = sp.inf
+        return p_inv, t_inv
 
     def get_drainage_data(self):
         r"""
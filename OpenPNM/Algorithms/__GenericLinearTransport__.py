@@ -5,6 +5,7 @@ module __GenericLinearTransport__: Class for solving linear transport processes
 ===============================================================================
 
 """
+import hashlib
 import scipy as sp
 import scipy.sparse as sprs
 import scipy.sparse.linalg as sprslin
@@ -15,12 +16,74 @@ from OpenPNM.Base import logging
 logger = logging.getLogger(__name__)
 
 
+def _spsolve(A, b, **kwargs):
+    r"""
+    Direct solver (SuperLU on default Scipy installation)
+    """
+    return sprslin.spsolve(A, b), 0
+
+
+def _jacobi(A, **kwargs):
+    r"""
+    Diagonal (Jacobi) preconditioner
+
+    Notes
+    -----
+    The iterative solvers work on a system scaled to a unit diagonal unless
+    an explicit ``M`` is given, so under the default scaling this
+    preconditioner is the identity and has no effect.
+    """
+    d = A.diagonal().copy()
+    d[d == 0] = 1
+    return sprslin.LinearOperator(A.shape, matvec=lambda x: sp.ravel(x)/d)
+
+
+def _ilu(A, drop_tol=None, fill_factor=None, **kwargs):
+    r"""
+    Incomplete LU preconditioner based on ``scipy.sparse.linalg.spilu``
+    """
+    ilu = sprslin.spilu(A.tocsc(), drop_tol=drop_tol, fill_factor=fill_factor)
+    return sprslin.LinearOperator(A.shape, matvec=ilu.solve)
+
+
+def _amg(A, **kwargs):
+    r"""
+    Smoothed aggregation algebraic multigrid preconditioner, which requires
+    the optional ``pyamg`` package
+    """
+    try:
+        import pyamg
+    except ImportError:
+        raise Exception('The amg preconditioner requires pyamg to be ' +
+                        'installed')
+    return pyamg.smoothed_aggregation_solver(A.tocsr()).aspreconditioner()
+
+
 class GenericLinearTransport(GenericAlgorithm):
     r"""
     This class provides essential methods for building and solving matrices
     in a transport process.  It is inherited by FickianDiffusion,
     FourierConduction, StokesFlow and OhmicConduction.
+
+    Notes
+    -----
+    The available linear solvers and preconditioners are listed in the
+    ``solvers`` and ``preconditioners`` dictionaries.  Custom ones can be
+    added to these dictionaries, as long as they follow the call signature
+    of the existing entries (solvers return the solution and an info flag,
+    preconditioners return a ``LinearOperator``).
     """
+
+    solvers = {'spsolve': _spsolve,
+               'cg': sprslin.cg,
+               'gmres': sprslin.gmres,
+               'bicgstab': sprslin.bicgstab,
+               'minres': sprslin.minres}
+
+    preconditioners = {'jacobi': _jacobi,
+                       'ilu': _ilu,
+                       'amg': _amg}
+
     def __init__(self, phase=None, **kwargs):
         super().__init__(**kwargs)
         if phase is None:
@@ -36,6 +99,62 @@ class GenericLinearTransport(GenericAlgorithm):
         if self._net is not phase._net:
             raise Exception(phase.name + 'and this algorithm are associated' +
                             ' with different networks.')
+        self._solver_settings = {'solver': 'spsolve', 'preconditioner': None}
+
+    def set_solver(self, solver='spsolve', preconditioner=None, **kwargs):
+        r"""
+        Specifies the linear solver used by this algorithm in subsequent calls
+        to ``run`` or ``solve``.
+
+        Parameters
+        ----------
+        solver : string
+            The name of the solver, which must be one of the keys in
+            ``solvers``.  The default is 'spsolve' which is a direct solver.
+            The iterative options are 'cg', 'gmres', 'bicgstab' and 'minres'.
+
+        preconditioner : string, optional
+            The name of the preconditioner to use with the iterative solvers,
+            which must be one of the keys in ``preconditioners``.  Options are
+            'jacobi', 'ilu' and 'amg' (the latter requires pyamg).
+
+        kwargs : list of keyword arguments
+            These are stored and sent to the solver and preconditioner, such as
+            'tol', 'maxiter' and 'restart' for the iterative solvers or
+            'drop_tol' and 'fill_factor' for the 'ilu' preconditioner.  For
+            the 'spsolve' solver, ``cache_factorization=True`` keeps the LU
+            factors of the coefficient matrix so that subsequent runs which
+            only change the right-hand side (i.e. Dirichlet or Neumann values)
+            skip the factorization.
+
+        Notes
+        -----
+        The iterative solvers operate on the symmetrically diagonal-scaled
+        system, so 'tol' (default 1e-14) is relative to a matrix with a unit
+        diagonal rather than to the raw conductance values.  This scaling is
+        already a Jacobi preconditioning, so 'jacobi' adds nothing to it.
+        The Dirichlet values are moved to the right-hand side beforehand, so
+        the scaled matrix stays symmetric for use with 'cg' and 'minres'.
+
+        Examples
+        --------
+        >>> import OpenPNM
+        >>> pn = OpenPNM.Network.TestNet()
+        >>> phase = OpenPNM.Phases.TestPhase(network=pn)
+        >>> alg = OpenPNM.Algorithms.FickianDiffusion(network=pn, phase=phase)
+        >>> alg.set_solver(solver='bicgstab', preconditioner='ilu', tol=1e-10)
+        """
+        if solver not in self.solvers.keys():
+            raise Exception('GenericLinearTransport does not support the' +
+                            ' requested solver: ' + str(solver))
+        if preconditioner is not None and \
+                preconditioner not in self.preconditioners.keys():
+            raise Exception('GenericLinearTransport does not support the' +
+                            ' requested preconditioner: ' +
+                            str(preconditioner))
+        self._solver_settings = {'solver': solver,
+                                 'preconditioner': preconditioner}
+        self._solver_settings.update(kwargs)
 
     def set_boundary_conditions(self, bctype='', bcvalue=None, pores=None,
                                 throats=None, mode='merge'):
@@ -80,6 +199,8 @@ class GenericLinearTransport(GenericAlgorithm):
             self._existing_BC
         except AttributeError:
             self._existing_BC = []
+        # Boundary conditions change the sparsity pattern of A
+        self._coeff_pattern = None
         if sp.size(self._phases) != 1:
             raise Exception('In each use of set_boundary_conditions ' +
                             'method, one component should be specified ' +
@@ -530,12 +651,23 @@ class GenericLinearTransport(GenericAlgorithm):
             1D RHS vector
 
         iterative_sovler : string
-            Name of solver to use.  If not solve is specified, sp.solve is used
-            which is a direct solver (SuperLU on default Scipy installation)
+            Name of solver to use.  If not given, the solver specified with
+            ``set_solver`` is used, which by default is 'spsolve', a direct
+            solver (SuperLU on default Scipy installation)
 
         kwargs : list of keyword arguments
             These arguments and values are sent to the sparse solver, so read
-            the specific documentation for the solver chosen
+            the specific documentation for the solver chosen.  When nonlinear
+            source terms are present, the iteration over them can be controlled
+            with 'nonlinear_solver' ('picard' or 'newton'), 'line_search' and
+            'anderson_depth' (see ``_do_one_outer_iteration``).
+
+        Notes
+        -----
+        A summary of the last linear solve is stored in ``solver_report``,
+        including the number of iterations and the relative residual.  For
+        nonlinear source terms, the iteration count and residual history are
+        stored in ``nonlinear_report``.
         """
         self._iterative_solver = iterative_solver
 
@@ -562,33 +694,195 @@ class GenericLinearTransport(GenericAlgorithm):
             A = self.A
         if b is None:
             b = self.b
-        if self._iterative_solver is None:
-            X = sprslin.spsolve(A, b)
+        settings = self._solver_settings.copy()
+        if getattr(self, '_iterative_solver', None) is not None:
+            settings['solver'] = self._iterative_solver
+        settings.update(kwargs)
+        solver = settings.pop('solver')
+        preconditioner = settings.pop('preconditioner')
+        if solver not in self.solvers.keys():
+            raise Exception('GenericLinearTransport does not support the' +
+                            ' requested solver: ' + str(solver))
+        if preconditioner is not None and \
+                preconditioner not in self.preconditioners.keys():
+            raise Exception('GenericLinearTransport does not support the' +
+                            ' requested preconditioner: ' +
+                            str(preconditioner))
+        params = {}
+        counter = [0]
+        if solver != 'spsolve':
+            solver_params = ['x0', 'tol', 'maxiter', 'xtype', 'M', 'callback',
+                             'restart']
+            params = {item: settings[item] for item in solver_params
+                      if item in settings.keys()}
+            if params.get('tol') is None:
+                params['tol'] = 1e-14
+            # Dirichlet rows are identity rows, but their columns still hold
+            # the couplings to the neighbouring pores.  Moving these known
+            # terms to the RHS makes A symmetric again, as cg/minres require.
+            As = sprs.csr_matrix(A, copy=True)
+            As.eliminate_zeros()
+            diag = As.diagonal()
+            fixed = (sp.diff(As.indptr) == 1) * (diag != 0)
+            bs = sp.array(sp.ravel(b), dtype=float)
+            if sp.any(fixed):
+                x_fixed = sp.where(fixed, bs, 0)/sp.where(fixed, diag, 1)
+                bs = sp.where(fixed, bs, bs - As*x_fixed)
+                # The decoupled Dirichlet rows take the sign of the other
+                # diagonal entries, so that a definite matrix stays definite
+                sign = -1.0 if sp.sum(diag[~fixed]) < 0 else 1.0
+                diag = sp.where(fixed, sign*sp.absolute(diag), diag)
+                bs = sp.where(fixed, diag*x_fixed, bs)
+                As = As*sprs.diags((~fixed).astype(float), 0, format='csr') + \
+                    sprs.diags(diag*fixed, 0, format='csr')
+            # Symmetric diagonal scaling makes the tolerance meaningful when
+            # Dirichlet rows (unit diagonal) sit next to very small
+            # conductances, and keeps the symmetry of the eliminated matrix.
+            # It is skipped if a preconditioner M is given explicitly.
+            d = sp.ones((A.shape[0],))
+            if params.get('M') is None:
+                d = sp.absolute(diag)
+                d[d == 0] = 1
+                d = 1/sp.sqrt(d)
+            D = sprs.diags(d, 0, format='csr')
+            As = D*As*D
+            if params.get('x0') is not None:
+                params['x0'] = sp.ravel(params['x0'])/d
+            if preconditioner is not None and params.get('M') is None:
+                params['M'] = self.preconditioners[preconditioner](As,
+                                                                   **settings)
+            # Count the iterations, while still calling any given callback
+            user_callback = params.get('callback')
+
+            def callback(xk):
+                counter[0] += 1
+                if user_callback is not None:
+                    user_callback(xk)
+            params['callback'] = callback
+            X, info = self.solvers[solver](As, d*bs, **params)
+            X = d*X
+        elif settings.get('cache_factorization', False):
+            X = self._factorize(A).solve(sp.ravel(b))
+            info = 0
         else:
-            if self._iterative_solver not in ['cg', 'gmres']:
-                raise Exception('GenericLinearTransport does not support the' +
-                                ' requested iterative solver!')
-            params = kwargs.copy()
-            solver_params = ['x0', 'tol', 'maxiter', 'xtype', 'M', 'callback']
-            [params.pop(item, None) for item in kwargs.keys()
-             if item not in solver_params]
-            tol = kwargs.get('tol')
-            if tol is None:
-                tol = 1e-20
-            params['tol'] = tol
-            if self._iterative_solver == 'cg':
-                result = sprslin.cg(A, b, **params)
-            elif self._iterative_solver == 'gmres':
-                result = sprslin.gmres(A, b, **params)
-            X = result[0]
-            self._iterative_solver_info = result[1]
+            X, info = self.solvers[solver](A, b, **params)
+        residual = sp.linalg.norm(sp.ravel(b) - A*X)
+        b_norm = sp.linalg.norm(b)
+        if b_norm > 0:
+            residual = residual/b_norm
+        self._iterative_solver_info = info
+        self.solver_report = {'solver': solver,
+                              'preconditioner': preconditioner,
+                              'info': info,
+                              'iterations': counter[0],
+                              'residual': residual}
+        if info != 0:
+            logger.warning(solver + ' did not converge (info = ' +
+                           str(info) + '), relative residual: ' +
+                           str(residual))
         return X
 
-    def _do_one_outer_iteration(self, **kwargs):
+    def solve_batch(self, b, A=None):
+        r"""
+        Solves the linear system for several right-hand sides at once, using a
+        single LU factorization of the coefficient matrix.
+
+        Parameters
+        ----------
+        b : array_like
+            The right-hand sides, with one column per problem.  Each column
+            must have the same length as the ``b`` created by ``setup``.
+
+        A : sparse matrix, optional
+            2D Coefficient matrix.  If not given the matrix created by
+            ``setup`` is used.
+
+        Returns
+        -------
+        An Np-by-k array containing the solution for each right-hand side.
+
+        Notes
+        -----
+        The factorization is cached on the algorithm and reused as long as the
+        values of the coefficient matrix do not change.  Nonlinear source terms
+        are not supported, since they require the matrix to be updated.
+
+        Examples
+        --------
+        >>> import OpenPNM
+        >>> import scipy as sp
+        >>> pn = OpenPNM.Network.TestNet()
+        >>> geo = OpenPNM.Geometry.TestGeometry(network=pn, pores=pn.Ps,
+        ...                                     throats=pn.Ts)
+        >>> phase = OpenPNM.Phases.TestPhase(network=pn)
+        >>> phys = OpenPNM.Physics.TestPhysics(network=pn, phase=phase,
+        ...                                    pores=pn.Ps, throats=pn.Ts)
+        >>> alg = OpenPNM.Algorithms.FickianDiffusion(network=pn, phase=phase)
+        >>> alg.set_boundary_conditions(bctype='Dirichlet', bcvalue=1.0,
+        ...                             pores=pn.pores('top'))
+        >>> alg.setup()
+        >>> X = alg.solve_batch(sp.hstack((alg.b, 2*alg.b)))
+        >>> sp.allclose(2*X[:, 0], X[:, 1])
+        True
+        """
+        if any('pore.source_nonlinear' in s for s in self.props()):
+            raise Exception('solve_batch does not support nonlinear source ' +
+                            'terms')
+        if A is None:
+            A = self.A
+        b = sp.array(b, dtype=float)
+        if b.ndim == 1:
+            b = sp.reshape(b, [sp.size(b), 1])
+        X = self._factorize(A).solve(b)
+        return X[self.Ps, :]
+
+    def _factorize(self, A):
+        r"""
+        Returns the LU factorization of A, reusing the cached one if the
+        fingerprint of A (structure and values) has not changed.
+        """
+        A = sprs.csr_matrix(A)
+        h = hashlib.sha1(sp.array(A.shape))
+        for arr in [A.indptr, A.indices, A.data]:
+            h.update(sp.ascontiguousarray(arr))
+        fingerprint = h.hexdigest()
+        cache = getattr(self, '_factorization', None)
+        if cache is None or cache[0] != fingerprint:
+            logger.info('Factorizing the coefficient matrix')
+            cache = (fingerprint, sprslin.splu(sprs.csc_matrix(A)))
+            self._factorization = cache
+        return cache[1]
+
+    def __getstate__(self):
+        # The SuperLU object cannot be pickled, so it's recomputed on demand
+        state = self.__dict__.copy()
+        state.pop('_factorization', None)
+        return state
+
+    def _do_one_outer_iteration(self, nonlinear_solver='picard',
+                                line_search=True, anderson_depth=0, **kwargs):
         r"""
         One iteration of an outer iteration loop for an algorithm
-        (e.g. time or parametric study)
+        (e.g. time or parametric study).  This iterates over the nonlinear
+        source terms using the method given by ``nonlinear_solver``:
+
+        **'picard'** : (default) Each step solves the system linearized at
+        the previous solution.  Setting ``anderson_depth`` > 0 applies
+        Anderson acceleration over that many previous steps.
+
+        **'newton'** : Newton-Raphson iteration using the analytical
+        linearization (S1, S2) of the source terms, with a backtracking line
+        search on the residual of the nonlinear system if ``line_search`` is
+        True.  If no damped step reduces the residual the full step is taken,
+        and convergence is always judged on the size of the undamped update.
+
+        The number of iterations and the history of the residual and of the
+        change in the solution are stored in ``nonlinear_report``.
         """
+        if nonlinear_solver not in ['picard', 'newton']:
+            raise Exception('GenericLinearTransport does not support the ' +
+                            'requested nonlinear solver: ' +
+                            str(nonlinear_solver))
         # Checking for the necessary values in Picard algorithm
         nan_tol = sp.isnan(self['pore.source_tol'])
         nan_max = sp.isnan(self['pore.source_maxiter'])
@@ -596,16 +890,52 @@ class GenericLinearTransport(GenericAlgorithm):
         self._maxiter_for_all = sp.amax(self['pore.source_maxiter'][~nan_max])
         if self._guess is None:
             self._guess = sp.zeros(self._coeff_dimension)
+        x = sp.ones((self._coeff_dimension,))*self._guess
+        A, b, res = self._linearize_source_terms(guess=x)
+        report = {'method': nonlinear_solver, 'iterations': 0,
+                  'residual': [res], 'tol': []}
+        G_hist = []
+        F_hist = []
         t = 1
         step = 0
-        # The main Picard loop
+        # The main iteration loop
         while t > self._tol_for_all and step <= self._maxiter_for_all:
-            X, t, A, b = self._do_inner_iteration_stage(guess=self._guess,
-                                                        **kwargs)
-            logger.info('tol for Picard source_algorithm in step ' +
-                        str(step) + ' : ' + str(t))
-            self._guess = X
+            X = self._do_one_inner_iteration(A=A, b=b, **kwargs)
+            if nonlinear_solver == 'newton':
+                dx = X - x
+                alpha = 1.0
+                A, b, res_new = self._linearize_source_terms(guess=X)
+                # Backtracking line search on the nonlinear residual
+                while line_search and res_new > res and alpha > 1e-3:
+                    alpha = alpha/2
+                    X = x + alpha*dx
+                    A, b, res_new = self._linearize_source_terms(guess=X)
+                if res_new > res and alpha < 1:
+                    # No damped step reduces the residual, so take the full
+                    # (Picard) step rather than one that also increases it
+                    logger.warning('Line search failed in step ' +
+                                   str(step) + ', taking the full step')
+                    X = x + dx
+                    A, b, res_new = self._linearize_source_terms(guess=X)
+                res = res_new
+                # Convergence is judged on the undamped update, since a
+                # damped step can be small without being close to the root
+                t = sp.amax(sp.absolute(dx))
+            else:
+                if anderson_depth > 0:
+                    X = self._anderson_update(x, X, G_hist, F_hist,
+                                              anderson_depth)
+                A, b, res = self._linearize_source_terms(guess=X)
+                t = sp.amax(sp.absolute(X - x))
+            logger.info('tol for ' + nonlinear_solver + ' source_algorithm' +
+                        ' in step ' + str(step) + ' : ' + str(t))
+            report['residual'].append(res)
+            report['tol'].append(t)
+            x = X
             step += 1
+        report['iterations'] = step
+        self.nonlinear_report = report
+        self._guess = x
         # Check for divergence
         self._steps = step
         if t >= self._tol_for_all and step > self._maxiter_for_all:
@@ -613,11 +943,29 @@ class GenericLinearTransport(GenericAlgorithm):
                             'to the maxiter: ' + str(self._maxiter_for_all) +
                             ' without achieving tol: ' +
                             str(self._tol_for_all))
-        logger.info('Picard algorithm for source term converged!')
+        logger.info(nonlinear_solver + ' algorithm for source term converged!')
         self.A = A
         self.b = b
         self._tol_reached = t
-        return X
+        return x
+
+    def _anderson_update(self, x, G, G_hist, F_hist, depth):
+        r"""
+        Returns the Anderson accelerated update of the fixed point iteration
+        x -> G, given the histories of previous G values and residuals (G - x)
+        which are updated in place.
+        """
+        G_hist.append(G)
+        F_hist.append(G - x)
+        if len(G_hist) > depth + 1:
+            G_hist.pop(0)
+            F_hist.pop(0)
+        if len(G_hist) < 2:
+            return G
+        dF = sp.diff(sp.vstack(F_hist).T, axis=1)
+        dG = sp.diff(sp.vstack(G_hist).T, axis=1)
+        gamma = sp.linalg.lstsq(dF, F_hist[-1])[0]
+        return G - sp.dot(dG, gamma)
 
     def _do_inner_iteration_stage(self, guess, **kwargs):
         r"""
@@ -625,6 +973,19 @@ class GenericLinearTransport(GenericAlgorithm):
         the quantity, then modifies A and b matrices, solves AX = b and
         returns the result.
         """
+        A, b, res = self._linearize_source_terms(guess=guess)
+        # Solving AX = b
+        X = self._do_one_inner_iteration(A=A, b=b, **kwargs)
+        # Calculates absolute error
+        t = sp.amax(sp.absolute(guess - X))
+        return X, t, A, b
+
+    def _linearize_source_terms(self, guess):
+        r"""
+        Updates the linearized source terms (S1, S2) based on the given values
+        of the quantity and returns the modified A and b matrices, along with
+        the norm of the residual of the nonlinear system at ``guess``.
+        """
         # Updating the source terms
         s1 = sp.zeros(self._coeff_dimension)
         s2 = sp.zeros(self._coeff_dimension)
@@ -662,11 +1023,11 @@ class GenericLinearTransport(GenericAlgorithm):
                                            mode='modify_diagonal')
         b = self._build_RHS_matrix(modified_RHS_pores=pores,
                                    RHS_added_data=-S2, mode='modify_RHS')
-        # Solving AX = b
-        X = self._do_one_inner_iteration(A=A, b=b, **kwargs)
-        # Calculates absolute error
-        t = sp.amax(sp.absolute(guess - X))
-        return X, t, A, b
+        # Since the linearization is exact at guess, A*guess - b is the
+        # residual of the nonlinear system
+        x = sp.ones((self._coeff_dimension,))*guess
+        res = sp.linalg.norm(A*x - sp.ravel(b))
+        return A, b, res
 
     def return_results(self, pores=None, throats=None, **kwargs):
         r"""
@@ -684,10 +1045,7 @@ class GenericLinearTransport(GenericAlgorithm):
         if phase_quantity not in self._phase.props():
             self._phase[phase_quantity] = sp.nan
         self._phase[phase_quantity][pores] = self[self._quantity][pores]
-        conn_arr = self._net.find_connected_pores(self.Ts)
-        dx = sp.squeeze(sp.diff(self[self._quantity][conn_arr], n=1, axis=1))
-        g = self['throat.conductance']
-        rate = sp.absolute(g * dx)
+        rate = sp.absolute(self.rate(mode='throats'))
         if 'throat.rate' not in self._phase.props():
             self._phase['throat.rate'] = sp.nan
         self._phase['throat.rate'][throats] = rate[throats]
@@ -700,93 +1058,29 @@ class GenericLinearTransport(GenericAlgorithm):
         This builds the sparse coefficient matrix for the linear solver.
         """
         if mode == 'overwrite':
-            # Filling coefficient matrix
-            tpore1 = self._net['throat.conns'][:, 0]
-            tpore2 = self._net['throat.conns'][:, 1]
-            # Identify Dirichlet pores
-            try:
-                temp = self.pores('Dirichlet', mode='difference')
-            except KeyError:
-                temp = self.Ps
-                logger.warning('No direct Dirichlet boundary condition has ' +
-                               'been applied to the phase ' +
-                               self._phase.name + ' in the algorithm ' +
-                               self.name)
-            loc1 = sp.in1d(tpore1, temp)
-            loc2 = sp.in1d(tpore2, temp)
-            modified_tpore1 = tpore1[loc1]
-            modified_tpore2 = tpore2[loc1]
-            row = modified_tpore1
-            col = modified_tpore2
             # Expand the conductance to a vector if necessary
             g = self['throat.conductance']
             if sp.size(g) == 1:
                 g = g * sp.ones(self.Nt)
-            data_main = g
-            data = data_main[loc1]
-            modified_tpore2 = tpore2[loc2]
-            modified_tpore1 = tpore1[loc2]
-            row = sp.append(row, modified_tpore2)
-            col = sp.append(col, modified_tpore1)
-            data = sp.append(data, data_main[loc2])
-            A_dim = self.Np
-            # Check for Neuman_group BCs and add superpores if necessary
-            if 'pore.Neumann_group' in self.labels():
-                self._extra_Neumann_size = len(getattr(self, '_pore' +
-                                                       '_Neumann_group_' +
-                                                       'location'))
-                self._group_Neumann_vals = sp.zeros(self._extra_Neumann_size)
-                l_g_super = len(self.super_pore_conductance)
-                if l_g_super not in [0, 1, self._extra_Neumann_size]:
-                    raise Exception('length of the list of super_pore_'
-                                    'conductance and the number of different'
-                                    ' Neumann_group BCs do not match.')
-                if l_g_super == 1:
-                    t = [sp.array(self.super_pore_conductance)]
-                    self.super_pore_conductance = t * self._extra_Neumann_size
-                for N in sp.arange(0, self._extra_Neumann_size):
-                    neu_tpore2 = getattr(self, '_pore_' +
-                                         'Neumann_group_location')[N]
-                    Nval = self['pore.bcval_Neumann_group']
-                    self._group_Neumann_vals[N] = sp.unique(Nval[neu_tpore2])
-                    nt = self._net.find_neighbor_throats(pores=neu_tpore2)
-                    try:
-                        g_super = self.super_pore_conductance[N]
-                    except IndexError:
-                        g_super = 1e-3 * min(data_main[nt])
-                        self.super_pore_conductance.append(g_super)
-                    if sp.size(g_super) == 1:
-                        g_super = len(neu_tpore2)*[g_super]
-                    row = sp.append(row, neu_tpore2)
-                    col = sp.append(col, len(neu_tpore2) * [A_dim + N])
-                    data = sp.append(data, g_super)
-                    row = sp.append(row, len(neu_tpore2) * [A_dim + N])
-                    col = sp.append(col, neu_tpore2)
-                    data = sp.append(data, g_super)
-                A_dim = A_dim + self._extra_Neumann_size
-            # Adding positions for diagonal
-            diag = sp.arange(0, A_dim)
-            try:
-                pores = self.pores('Dirichlet')
-                row = sp.append(row, diag[pores])
-                col = sp.append(col, diag[pores])
-                data = sp.append(data, sp.ones_like(diag[pores]))
-                temp_data = sp.copy(data)
-                temp_data[sp.in1d(row, diag[pores])] = 0
-                non_Dir_diag = diag[~sp.in1d(diag, diag[pores])]
-            except KeyError:
-                temp_data = sp.copy(data)
-                non_Dir_diag = diag
-            S_temp = sp.zeros(A_dim)
-            for i in sp.arange(0, len(row)):
-                S_temp[row[i]] = S_temp[row[i]] - temp_data[i]
+            pattern = self._get_coeff_pattern()
+            if pattern is None or 'pore.Neumann_group' in self.labels():
+                pattern = self._build_coeff_pattern(g)
+            # Off-diagonal entries are the conductances of the throats in
+            # non-Dirichlet rows, followed by the super pore connections
+            data = sp.concatenate((g[pattern['throats']], pattern['extra']))
+            row = pattern['row']
+            A_dim = self._coeff_dimension
+            # Diagonal of each non-Dirichlet row is minus the sum of its
+            # off-diagonal entries, accumulated in a single scatter-add
+            S_temp = -sp.bincount(row[:sp.size(data)], weights=data,
+                                  minlength=A_dim)
+            data = sp.concatenate((data, sp.ones(pattern['num_Dir'])))
             # Store values for modifying the diagonal in mode='modify_diagonal'
             self._non_source_row = row
-            self._non_source_col = col
+            self._non_source_col = pattern['col']
             self._non_source_data = data
-            self._non_Dir_diag = non_Dir_diag
+            self._non_Dir_diag = pattern['non_Dir_diag']
             self._diagonal_vals = S_temp
-            self._coeff_dimension = A_dim
 
         if mode in ['overwrite', 'modify_diagonal']:
             diagonal_vals = sp.copy(self._diagonal_vals)
@@ -802,18 +1096,137 @@ class GenericLinearTransport(GenericAlgorithm):
                                     ' size!')
                 if mode == 'overwrite':
                     self._diagonal_vals = diagonal_vals
-            data = sp.append(self._non_source_data,
-                             diagonal_vals[self._non_Dir_diag])
-            row = sp.append(self._non_source_row, self._non_Dir_diag)
-            col = sp.append(self._non_source_col, self._non_Dir_diag)
-            # Convert the lists to the sparse matrix
-            a = sprs.coo.coo_matrix((data, (row, col)),
-                                    (self._coeff_dimension,
-                                     self._coeff_dimension))
-            A = a.tocsr()
-            A.eliminate_zeros()
+            data = sp.concatenate((self._non_source_data,
+                                   diagonal_vals[self._non_Dir_diag]))
+            # Write the values into the cached CSR structure in place
+            pattern = self._coeff_pattern
+            A = pattern['A']
+            A.data[:] = sp.bincount(pattern['nnz_map'], weights=data,
+                                    minlength=A.nnz)
             return(A)
 
+    def _build_coeff_pattern(self, g):
+        r"""
+        Finds the (row, col) positions of the entries of the coefficient
+        matrix and stores them, along with the CSR structure of ``A``, using
+        ``_update_coeff_pattern``.
+        """
+        tpore1 = self._net['throat.conns'][:, 0]
+        tpore2 = self._net['throat.conns'][:, 1]
+        # Identify Dirichlet pores
+        try:
+            Dir_mask = self['pore.Dirichlet']
+        except KeyError:
+            Dir_mask = sp.zeros((self.Np,), dtype=bool)
+            logger.warning('No direct Dirichlet boundary condition has ' +
+                           'been applied to the phase ' +
+                           self._phase.name + ' in the algorithm ' +
+                           self.name)
+        # Off-diagonal entries are only needed in non-Dirichlet rows
+        loc1 = ~Dir_mask[tpore1]
+        loc2 = ~Dir_mask[tpore2]
+        Ts = sp.arange(self.Nt)
+        row = [tpore1[loc1], tpore2[loc2]]
+        col = [tpore2[loc1], tpore1[loc2]]
+        throats = sp.concatenate((Ts[loc1], Ts[loc2]))
+        extra = []
+        A_dim = self.Np
+        # Check for Neuman_group BCs and add superpores if necessary
+        if 'pore.Neumann_group' in self.labels():
+            self._extra_Neumann_size = len(getattr(self, '_pore' +
+                                                   '_Neumann_group_' +
+                                                   'location'))
+            self._group_Neumann_vals = sp.zeros(self._extra_Neumann_size)
+            l_g_super = len(self.super_pore_conductance)
+            if l_g_super not in [0, 1, self._extra_Neumann_size]:
+                raise Exception('length of the list of super_pore_'
+                                'conductance and the number of different'
+                                ' Neumann_group BCs do not match.')
+            if l_g_super == 1:
+                t = [sp.array(self.super_pore_conductance)]
+                self.super_pore_conductance = t * self._extra_Neumann_size
+            for N in sp.arange(0, self._extra_Neumann_size):
+                neu_tpore2 = getattr(self, '_pore_' +
+                                     'Neumann_group_location')[N]
+                Nval = self['pore.bcval_Neumann_group']
+                self._group_Neumann_vals[N] = sp.unique(Nval[neu_tpore2])
+                nt = self._net.find_neighbor_throats(pores=neu_tpore2)
+                try:
+                    g_super = self.super_pore_conductance[N]
+                except IndexError:
+                    g_super = 1e-3 * min(g[nt])
+                    self.super_pore_conductance.append(g_super)
+                g_super = sp.ones(len(neu_tpore2)) * g_super
+                super_pore = sp.ones_like(neu_tpore2) * (A_dim + N)
+                row.extend([neu_tpore2, super_pore])
+                col.extend([super_pore, neu_tpore2])
+                extra.extend([g_super, g_super])
+            A_dim = A_dim + self._extra_Neumann_size
+        # Adding positions for diagonal
+        diag = sp.arange(0, A_dim)
+        Dir_rows = sp.zeros((A_dim,), dtype=bool)
+        Dir_rows[:self.Np] = Dir_mask
+        row.append(diag[Dir_rows])
+        col.append(diag[Dir_rows])
+        row = sp.concatenate(row).astype(int)
+        col = sp.concatenate(col).astype(int)
+        non_Dir_diag = diag[~Dir_rows]
+        self._coeff_dimension = A_dim
+        pattern = self._get_coeff_pattern()
+        if pattern is None:
+            pattern = self._update_coeff_pattern(
+                sp.concatenate((row, non_Dir_diag)),
+                sp.concatenate((col, non_Dir_diag)))
+        pattern.update({'row': row, 'col': col, 'throats': throats,
+                        'extra': sp.concatenate(extra + [[]]).astype(float),
+                        'num_Dir': sp.sum(Dir_rows),
+                        'non_Dir_diag': non_Dir_diag})
+        return pattern
+
+    def _get_coeff_pattern(self):
+        r"""
+        Returns the stored pattern of the coefficient matrix, or None if the
+        topology of the network has changed since it was built.  Changes to
+        the boundary conditions discard the pattern directly.
+        """
+        pattern = getattr(self, '_coeff_pattern', None)
+        if pattern is None:
+            return None
+        if pattern['conns'] is not self._net['throat.conns'] or \
+                pattern['shape'] != (self.Np, self.Nt):
+            return None
+        return pattern
+
+    def _update_coeff_pattern(self, row, col):
+        r"""
+        Stores the CSR sparsity pattern of the coefficient matrix along with
+        a map from each (row, col) entry to its position in ``A.data``.  The
+        pattern is only rebuilt when the boundary conditions or the topology
+        of the network change, so repeated calls to ``setup`` with new
+        conductance values only overwrite ``A.data``.
+
+        Notes
+        -----
+        The topology is identified by the 'throat.conns' array of the network,
+        which is replaced by the methods that change it, and the pattern is
+        discarded by ``set_boundary_conditions``.  Boundary conditions written
+        directly into the 'pore.Dirichlet' array are therefore not detected.
+
+        Since the same matrix object is reused, a reference to ``A`` held from
+        a previous run will reflect the values of the latest run.
+        """
+        A_dim = self._coeff_dimension
+        keys, nnz_map = sp.unique(row * A_dim + col, return_inverse=True)
+        indptr = sp.zeros((A_dim + 1,), dtype=int)
+        indptr[1:] = sp.cumsum(sp.bincount(keys // A_dim, minlength=A_dim))
+        A = sprs.csr_matrix((sp.zeros((sp.size(keys),)), keys % A_dim, indptr),
+                            shape=(A_dim, A_dim))
+        pattern = {'conns': self._net['throat.conns'],
+                   'shape': (self.Np, self.Nt),
+                   'nnz_map': nnz_map, 'A': A}
+        self._coeff_pattern = pattern
+        return pattern
+
     def _build_RHS_matrix(self, modified_RHS_pores=None, RHS_added_data=None,
                           mode='overwrite'):
         r"""
@@ -889,6 +1302,17 @@ class GenericLinearTransport(GenericAlgorithm):
             them
 
             **'single'** : It calculates the rate for each pore individually.
+
+            **'throats'** : It returns the rate through every throat in the
+            network, positive when flowing from ``throat.conns[:, 0]`` to
+            ``throat.conns[:, 1]``.  The ``pores`` argument is ignored.
+
+        Notes
+        -----
+        All modes are computed from the throat rates in a single vectorized
+        pass.  The net rate into each pore is the sum of the rates of its
+        throats, so in 'group' mode throats connecting two of the given pores
+        cancel out.
         """
 
         if network is None:
@@ -897,34 +1321,25 @@ class GenericLinearTransport(GenericAlgorithm):
             conductance = self['throat.conductance']
         if X_value is None:
             X_value = self[self._quantity]
+        conns = network['throat.conns']
+        X_value = sp.array(X_value, ndmin=1)
+        # Rate through each throat, from conns[:, 0] towards conns[:, 1]
+        Q = conductance*(X_value[conns[:, 0]] - X_value[conns[:, 1]])
+        if sp.size(Q) == 1:
+            Q = Q*sp.ones((network.Nt, ))
+        if mode == 'throats':
+            return sp.array(Q, ndmin=1)
+        # Net rate into each pore
+        R = sp.bincount(conns[:, 1], weights=Q, minlength=network.Np) - \
+            sp.bincount(conns[:, 0], weights=Q, minlength=network.Np)
         pores = sp.array(pores, ndmin=1)
-        R = []
         if mode == 'group':
-            t = network.find_neighbor_throats(pores, flatten=True,
-                                              mode='not_intersection')
-            throat_group_num = 1
+            R = sp.sum(R[sp.unique(pores)])
         elif mode == 'single':
-            t = network.find_neighbor_throats(pores, flatten=False,
-                                              mode='not_intersection')
-            throat_group_num = sp.shape(t)[0]
-        for i in sp.r_[0: throat_group_num]:
-            if mode == 'group':
-                throats = t
-                P = pores
-            elif mode == 'single':
-                throats = t[i]
-                P = pores[i]
-            p1 = network.find_connected_pores(throats)[:, 0]
-            p2 = network.find_connected_pores(throats)[:, 1]
-            pores1 = sp.copy(p1)
-            pores2 = sp.copy(p2)
-            # Changes to pores1 and pores2 to make them as inner/outer pores
-            pores1[~sp.in1d(p1, P)] = p2[~sp.in1d(p1, P)]
-            pores2[~sp.in1d(p1, P)] = p1[~sp.in1d(p1, P)]
-            X1 = X_value[pores1]
-            X2 = X_value[pores2]
-            g = conductance[throats]
-            R.append(sp.sum(sp.multiply(g, (X2 - X1))))
+            R = R[pores]
+        else:
+            raise Exception('The mode (' + mode + ') cannot be applied to ' +
+                            'the rate method!')
         return(sp.array(R, ndmin=1))
 
     def _calc_eff_prop(self, check_health=False):
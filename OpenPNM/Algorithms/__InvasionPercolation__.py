@@ -11,6 +11,134 @@ import numpy as np
 from OpenPNM.Algorithms import GenericAlgorithm
 from OpenPNM.Base import logging
 logger = logging.getLogger(__name__)
+try:
+    import numba
+except ImportError:
+    numba = None
+
+
+def _invade(queue, t_sorted, conns, indptr, ranks, t_inv, p_inv, tcount,
+            n_steps, max_rank, p_stop, p_vol, t_vol, vol, max_vol):
+    r"""
+    Pure Python invasion loop, working on lists.  The throats neighboring
+    each pore are given by ``ranks[indptr[p]:indptr[p+1]]`` as positions in
+    the sorted list of entry pressures, which are what is stored on the heap.
+
+    The loop stops early before invading a throat ranked ``max_rank`` or
+    higher, after invading any pore flagged in ``p_stop``, or once the
+    invaded volume ``vol`` reaches ``max_vol``.  The last value returned is
+    True if it stopped before completing ``n_steps`` steps.
+    """
+    count = 0
+    stop = False
+    while (len(queue) > 0) and (count < n_steps) and (vol < max_vol):
+        if queue[0] >= max_rank:
+            break
+        # Find throat at the top of the queue
+        t = hq.heappop(queue)
+        # Extract actual throat number
+        t_next = t_sorted[t]
+        t_inv[t_next] = tcount
+        vol += t_vol[t_next]
+        # If throat is duplicated
+        while len(queue) > 0 and queue[0] == t:
+            t = hq.heappop(queue)
+        # Find pores connected to newly invaded throat
+        for p in conns[t_next]:
+            # Skip already invaded pores
+            if p_inv[p] < 0:
+                p_inv[p] = tcount
+                vol += p_vol[p]
+                stop = stop or p_stop[p]
+                # Queue the neighboring throats which are not yet invaded
+                for T in ranks[indptr[p]:indptr[p+1]]:
+                    if t_inv[t_sorted[T]] < 0:
+                        hq.heappush(queue, T)
+        count += 1
+        tcount += 1
+        if stop:
+            break
+    return tcount, vol, stop or count < n_steps
+
+
+def _heap_push(heap, size, item):
+    r"""
+    Push ``item`` onto the binary heap stored in ``heap[:size]``
+    """
+    i = size
+    heap[i] = item
+    while i > 0:
+        parent = (i - 1) >> 1
+        if heap[parent] <= item:
+            break
+        heap[i] = heap[parent]
+        i = parent
+    heap[i] = item
+    return size + 1
+
+
+def _heap_pop(heap, size):
+    r"""
+    Remove the smallest item from the binary heap stored in ``heap[:size]``
+    """
+    top = heap[0]
+    size -= 1
+    item = heap[size]
+    i = 0
+    while True:
+        child = 2*i + 1
+        if child >= size:
+            break
+        if child + 1 < size and heap[child + 1] < heap[child]:
+            child += 1
+        if heap[child] >= item:
+            break
+        heap[i] = heap[child]
+        i = child
+    if size > 0:
+        heap[i] = item
+    return top, size
+
+
+def _invade_arrays(heap, size, t_sorted, conns, indptr, ranks, t_inv, p_inv,
+                   tcount, n_steps, max_rank, p_stop, p_vol, t_vol, vol,
+                   max_vol):
+    r"""
+    Array based version of ``_invade`` which is compiled with numba when it
+    is installed.  The heap is kept in the first ``size`` entries of ``heap``.
+    """
+    count = 0
+    stop = False
+    while size > 0 and count < n_steps and vol < max_vol:
+        if heap[0] >= max_rank:
+            break
+        t, size = _heap_pop(heap, size)
+        t_next = t_sorted[t]
+        t_inv[t_next] = tcount
+        vol += t_vol[t_next]
+        while size > 0 and heap[0] == t:
+            t, size = _heap_pop(heap, size)
+        for j in range(2):
+            p = conns[t_next, j]
+            if p_inv[p] < 0:
+                p_inv[p] = tcount
+                vol += p_vol[p]
+                stop = stop or p_stop[p]
+                for k in range(indptr[p], indptr[p+1]):
+                    T = ranks[k]
+                    if t_inv[t_sorted[T]] < 0:
+                        size = _heap_push(heap, size, T)
+        count += 1
+        tcount += 1
+        if stop:
+            break
+    return size, tcount, vol, stop or count < n_steps
+
+
+if numba is not None:
+    _heap_push = numba.njit(_heap_push)
+    _heap_pop = numba.njit(_heap_pop)
+    _invade_arrays = numba.njit(_invade_arrays)
 
 
 class InvasionPercolation(GenericAlgorithm):
@@ -56,6 +184,10 @@ class InvasionPercolation(GenericAlgorithm):
         self['throat.invaded'] = -sp.ones((self._net.Nt,))
         self['pore.invaded'] = -sp.ones((self._net.Np,))
         self._tcount = 0
+        # Neighboring throats of each pore, given by their sorted position
+        im = self._net.create_incidence_matrix(sprsfmt='csr')
+        self._indptr = im.indptr
+        self._ranks = self['throat.order'][im.indices]
 
     def set_inlets(self, pores=None, **kwargs):
         r"""
@@ -71,10 +203,12 @@ class InvasionPercolation(GenericAlgorithm):
 
         # Perform initial analysis on input pores
         Ts = self._net.find_neighbor_throats(pores=pores)
-        self.queue = []
-        [hq.heappush(self.queue, T) for T in self['throat.order'][Ts]]
+        self.queue = self['throat.order'][Ts].tolist()
+        hq.heapify(self.queue)
 
-    def run(self, n_steps=None, **kwargs):
+    def run(self, n_steps=None, compiled=None, outlets=None,
+            max_pressure=None, saturation=None, checkpoint=None,
+            checkpoint_steps=100000, **kwargs):
         r"""
         Perform the algorithm
 
@@ -83,48 +217,185 @@ class InvasionPercolation(GenericAlgorithm):
         n_steps : int
             The number of throats to invaded during this step
 
+        compiled : boolean, optional
+            If True the invasion loop is compiled with numba, which must be
+            installed.  If False the pure Python loop is used.  The default is
+            to use numba whenever it is available.  Both give identical
+            results.
+
+        outlets : array_like or string, optional
+            A list of pores, or the label of the pores, which stop the
+            invasion as soon as one of them is invaded (i.e. at breakthrough).
+
+        max_pressure : float, optional
+            The invasion stops before any throat with a higher entry pressure
+            is invaded.
+
+        saturation : float, optional
+            The invasion stops once the invaded fraction of the total pore and
+            throat volume reaches this value.  Inlet pores are counted as
+            invaded.
+
+        checkpoint : string, optional
+            If given, the state of the invasion is saved to this file every
+            ``checkpoint_steps`` steps and when the run finishes, so that it
+            can be resumed with ``load_checkpoint`` if interrupted.
+
+        checkpoint_steps : int
+            The number of steps between checkpoints.  The default is 100000.
+
+        Notes
+        -----
+        Calling ``run`` again after it stopped continues the invasion from
+        where it left off.  For instance, a run stopped at breakthrough can be
+        continued with a different set of stop conditions.
+
         """
         if 'throat.entry_pressure' not in self.keys():
             self.setup(**kwargs)
         if sp.all(self['pore.invaded'] == -1):
             self.set_inlets(**kwargs)
 
-        if n_steps is None:
-            n_steps = sp.inf
+        if compiled is None:
+            compiled = numba is not None
+        if compiled and numba is None:
+            raise Exception('The compiled invasion loop requires numba to be ' +
+                            'installed')
 
-        queue = self.queue
-        if len(queue) == 0:
+        if len(self.queue) == 0:
             logger.warn('queue is empty, this network is fully invaded')
             return
+        # Each step removes at least one entry from the queue
+        max_steps = len(self.queue) + 2*self._net.Nt
+        if n_steps is None or n_steps > max_steps:
+            n_steps = max_steps
+        n_steps = int(n_steps)
+        # Convert the stop conditions into the form used by the loop
+        p_stop = sp.zeros((self._net.Np,), dtype=bool)
+        if outlets is not None:
+            if type(outlets) is str:
+                outlets = self._net.pores(labels=outlets)
+            p_stop[outlets] = True
+        max_rank = self._net.Nt
+        if max_pressure is not None:
+            t_entry = self['throat.entry_pressure'][self['throat.sorted']]
+            max_rank = int(sp.searchsorted(t_entry, max_pressure,
+                                           side='right'))
+        p_vol = sp.zeros((self._net.Np,))
+        t_vol = sp.zeros((self._net.Nt,))
+        vol = 0.0
+        max_vol = sp.inf
+        if saturation is not None:
+            p_vol = self._net['pore.volume']
+            t_vol = self._net['throat.volume']
+            vol = sp.sum(p_vol[self['pore.invaded'] >= 0]) + \
+                sp.sum(t_vol[self['throat.invaded'] >= 0])
+            max_vol = saturation*(sp.sum(p_vol) + sp.sum(t_vol))
+
+        if checkpoint is None:
+            checkpoint_steps = n_steps
+        stop_args = (max_rank, p_stop, p_vol, t_vol)
+        done = False
+        while n_steps > 0 and not done:
+            steps = min(n_steps, checkpoint_steps)
+            vol, done = self._run_steps(steps, compiled, stop_args, vol,
+                                        max_vol)
+            if checkpoint is not None:
+                self.save_checkpoint(checkpoint)
+            n_steps -= steps
+        self['throat.invasion_sequence'] = self['throat.invaded']
+        self['pore.invasion_sequence'] = self['pore.invaded']
+
+    def _run_steps(self, n_steps, compiled, stop_args, vol, max_vol):
+        r"""
+        Hands the queue and sequence arrays to the invasion loop for up to
+        ``n_steps`` steps.  Returns the invaded volume and whether the loop
+        stopped early.
+        """
+        max_rank, p_stop, p_vol, t_vol = stop_args
+        queue = self.queue
         t_sorted = self['throat.sorted']
-        t_order = self['throat.order']
+        conns = self._net['throat.conns']
         t_inv = self['throat.invaded']
         p_inv = self['pore.invaded']
+        if compiled:
+            heap = sp.zeros((len(queue) + 2*self._net.Nt,), dtype=sp.int64)
+            heap[:len(queue)] = queue
+            size, self._tcount, vol, done = \
+                _invade_arrays(heap, len(queue), t_sorted, conns,
+                               self._indptr, self._ranks, t_inv, p_inv,
+                               self._tcount, n_steps, max_rank, p_stop,
+                               p_vol, t_vol, vol, max_vol)
+            self.queue = heap[:size].tolist()
+        else:
+            t_inv_list = t_inv.tolist()
+            p_inv_list = p_inv.tolist()
+            self._tcount, vol, done = \
+                _invade(queue, t_sorted.tolist(), conns.tolist(),
+                        self._indptr.tolist(), self._ranks.tolist(),
+                        t_inv_list, p_inv_list, self._tcount, n_steps,
+                        max_rank, p_stop.tolist(), p_vol.tolist(),
+                        t_vol.tolist(), vol, max_vol)
+            t_inv[:] = t_inv_list
+            p_inv[:] = p_inv_list
+        return vol, done
+
+    def save_checkpoint(self, filename):
+        r"""
+        Save the current state of the invasion so it can be resumed later.
 
-        count = 0
-        while (len(queue) > 0) and (count < n_steps):
-            # Find throat at the top of the queue
-            t = hq.heappop(queue)
-            # Extract actual throat number
-            t_next = t_sorted[t]
-            t_inv[t_next] = self._tcount
-            # If throat is duplicated
-            while len(queue) > 0 and queue[0] == t:
-                # Note: Preventing duplicate entries below might save some time here
-                t = hq.heappop(queue)
-            # Find pores connected to newly invaded throat
-            Ps = self._net['throat.conns'][t_next]
-            # Remove already invaded pores from Ps
-            Ps = Ps[p_inv[Ps] < 0]
-            if len(Ps) > 0:
-                p_inv[Ps] = self._tcount
-                Ts = self._net.find_neighbor_throats(pores=Ps)
-                Ts = Ts[t_inv[Ts] < 0]  # Remove already invaded throats from Ts
-                [hq.heappush(queue, T) for T in t_order[Ts]]
-            count += 1
-            self._tcount += 1
-        self['throat.invasion_sequence'] = t_inv
-        self['pore.invasion_sequence'] = p_inv
+        Parameters
+        ----------
+        filename : string
+            The name of the file to write.  The state is stored as a Numpy
+            'npz' file and the extension is added if not given.
+
+        Notes
+        -----
+        Only the invasion queue and sequence arrays are saved, so the
+        Network and entry pressures must be recreated as usual before calling
+        ``load_checkpoint``.
+        """
+        filename = filename.rsplit('.npz', 1)[0]
+        sp.savez(filename + '.npz',
+                 queue=sp.array(self.queue, dtype=sp.int64),
+                 tcount=self._tcount,
+                 pore_invaded=self['pore.invaded'],
+                 throat_invaded=self['throat.invaded'],
+                 throat_sorted=self['throat.sorted'])
+
+    def load_checkpoint(self, filename):
+        r"""
+        Restore the state of an invasion saved with ``save_checkpoint``, after
+        which ``run`` continues from the saved point.
+
+        Parameters
+        ----------
+        filename : string
+            The name of the file written by ``save_checkpoint``.
+
+        Notes
+        -----
+        ``setup`` must be called first with the same entry pressures that
+        were used to create the checkpoint.
+        """
+        if 'throat.entry_pressure' not in self.keys():
+            raise Exception('setup must be called before loading a checkpoint')
+        filename = filename.rsplit('.npz', 1)[0]
+        with sp.load(filename + '.npz') as data:
+            if (sp.shape(data['pore_invaded']) != (self._net.Np,)) or \
+                    (sp.shape(data['throat_invaded']) != (self._net.Nt,)):
+                raise Exception('The checkpoint does not match the size of ' +
+                                'the Network')
+            if sp.any(data['throat_sorted'] != self['throat.sorted']):
+                raise Exception('The checkpoint was created with different ' +
+                                'entry pressures')
+            self.queue = data['queue'].tolist()
+            self._tcount = int(data['tcount'])
+            self['pore.invaded'] = data['pore_invaded']
+            self['throat.invaded'] = data['throat_invaded']
+        self['throat.invasion_sequence'] = self['throat.invaded']
+        self['pore.invasion_sequence'] = self['pore.invaded']
 
     def return_results(self, pores=[], throats=[]):
         r"""
@@ -226,6 +497,10 @@ class InvasionPercolation(GenericAlgorithm):
         identified at the point of breakthrough or grow from nothing if the
         full invasion sequence is run, they are assigned numbers from 0 up.
 
+        Merging of clusters is done with a disjoint-set forest (union by rank
+        with path halving) over the cluster numbers, so each merge costs nearly
+        constant time instead of a relabelling of the whole network.
+
         Ref:
         [1] Masson, Y., 2016. A fast two-step algorithm for invasion
         percolation with trapping. Computers & Geosciences, 90, pp.41-48
@@ -242,6 +517,9 @@ class InvasionPercolation(GenericAlgorithm):
 
         Also creates 2 boolean arrays Np and Nt long called '<element>.trapped'
         """
+        Np = self._net.Np
+        is_outlet = np.zeros(Np, dtype=bool)
+        is_outlet[outlets] = True
         # First see if network is fully invaded
         invaded_ps = self['pore.invasion_sequence'] > -1
         if ~np.all(invaded_ps):
@@ -251,80 +529,116 @@ class InvasionPercolation(GenericAlgorithm):
             # -1 is the invaded fluid
             # -2 is the defender fluid able to escape
             # All others now trapped clusters which grow as invasion is reversed
-            out_clusters = sp.unique(clusters[outlets])
-            for c in out_clusters:
-                if c >= 0:
-                    clusters[clusters == c] = -2
+            out_clusters = np.unique(clusters[outlets])
+            out_clusters = out_clusters[out_clusters >= 0]
+            clusters[np.in1d(clusters, out_clusters)] = -2
         else:
             # Go from end
-            clusters = np.ones(self._net.Np, dtype=int)*-1
+            clusters = np.ones(Np, dtype=int)*-1
             clusters[outlets] = -2
 
-        # Turn into a list for indexing
-        inv_seq = np.vstack((self['pore.invasion_sequence'].astype(int),
-                             np.arange(0, self._net.Np, dtype=int))).T
-        # Reverse sort list
-        inv_seq = inv_seq[inv_seq[:, 0].argsort()][::-1]
+        # Reverse sort the pores by invasion sequence
+        inv_seq = self['pore.invasion_sequence'].astype(int)
+        order = inv_seq.argsort()[::-1]
         next_cluster_num = np.max(clusters)+1
+        # Disjoint-set forest over the cluster numbers, which are never more
+        # than the initial labels plus one new cluster per pore
+        Nc = max(next_cluster_num, 0) + Np
+        parent = np.arange(Nc).tolist()
+        rank = [0]*Nc
+        # Smallest cluster number in each set, which is the number reported
+        label = np.arange(Nc).tolist()
+        stopped = [False]*Nc
+
+        def find(c):
+            while parent[c] != c:
+                parent[c] = parent[parent[c]]
+                c = parent[c]
+            return c
+
+        am = self._net.create_adjacency_matrix(sprsfmt='csr')
+        indptr = am.indptr.tolist()
+        indices = am.indices.tolist()
+        clusters = clusters.tolist()
+        is_outlet = is_outlet.tolist()
+        verbose = logger.isEnabledFor(logging.INFO)
         # For all the steps after the inlets are set up to break-through
         # Reverse the sequence and assess the neighbors cluster state
-        stopped_clusters = np.zeros(self._net.Np, dtype=bool)
-        all_neighbors = self._net.find_neighbor_pores(self._net.pores(),
-                                                      flatten=False)
-        for un_seq, pore in inv_seq:
-            if pore not in outlets:  # Don't bother with outlets
-                nc = clusters[all_neighbors[pore]]  # Neighboring clusters
-                unique_ns = np.unique(nc[nc != -1])  # Unique Neighbors
-                seq_pore = "S:"+str(un_seq)+" P:"+str(pore)
-                if np.all(nc == -1):
-                    # This is the start of a new trapped cluster
-                    clusters[pore] = next_cluster_num
-                    next_cluster_num += 1
-                    msg = (seq_pore+" C:1 new cluster number: " +
-                           str(clusters[pore]))
-                    logger.info(msg)
-                elif len(unique_ns) == 1:
-                    # Grow the only connected neighboring cluster
-                    if not stopped_clusters[unique_ns[0]]:
-                        clusters[pore] = unique_ns[0]
-                        msg = (seq_pore+" C:2 joins cluster number: " +
-                               str(clusters[pore]))
-                        logger.info(msg)
-                    else:
-                        clusters[pore] = -2
-                elif -2 in unique_ns:
-                    # We have reached a sink neighbor, stop growing cluster
-                    msg = (seq_pore+" C:3 joins sink cluster")
-                    logger.info(msg)
-                    clusters[pore] = -2
-                    # Stop growth and merging
-                    stopped_clusters[unique_ns[unique_ns > -1]] = True
+        for pore in order.tolist():
+            if is_outlet[pore]:  # Don't bother with outlets
+                continue
+            # Roots of neighboring clusters, -2 for sinks, -1 ignored
+            ns = set()
+            for n in indices[indptr[pore]:indptr[pore+1]]:
+                c = clusters[n]
+                if c >= 0:
+                    ns.add(find(c))
+                elif c == -2:
+                    ns.add(-2)
+            if verbose:
+                seq_pore = "S:"+str(inv_seq[pore])+" P:"+str(pore)
+            if len(ns) == 0:
+                # This is the start of a new trapped cluster
+                clusters[pore] = next_cluster_num
+                next_cluster_num += 1
+                if verbose:
+                    logger.info(seq_pore+" C:1 new cluster number: " +
+                                str(clusters[pore]))
+            elif len(ns) == 1:
+                r = ns.pop()
+                # Grow the only connected neighboring cluster
+                if r >= 0 and not stopped[r]:
+                    clusters[pore] = label[r]
+                    if verbose:
+                        logger.info(seq_pore+" C:2 joins cluster number: " +
+                                    str(clusters[pore]))
                 else:
-                    # We might be able to do some merging
-                    # Check if any stopped clusters are neighbors
-                    if np.any(stopped_clusters[unique_ns]):
-                        msg = (seq_pore+" C:4 joins sink cluster")
-                        logger.info(msg)
-                        clusters[pore] = -2
-                        # Stop growing all neighboring clusters
-                        stopped_clusters[unique_ns] = True
-                    else:
-                        # Merge multiple un-stopped trapped clusters
-                        new_num = unique_ns[0]
-                        clusters[pore] = new_num
-                        for c in unique_ns:
-                            clusters[clusters == c] = new_num
-                            msg = (seq_pore + " C:5 merge clusters: " +
-                                   str(c) + " into "+str(new_num))
-                            logger.info(msg)
-
+                    clusters[pore] = -2
+            elif -2 in ns:
+                # We have reached a sink neighbor, stop growing cluster
+                if verbose:
+                    logger.info(seq_pore+" C:3 joins sink cluster")
+                clusters[pore] = -2
+                # Stop growth and merging
+                for r in ns:
+                    if r >= 0:
+                        stopped[r] = True
+            elif any(stopped[r] for r in ns):
+                # Check if any stopped clusters are neighbors
+                if verbose:
+                    logger.info(seq_pore+" C:4 joins sink cluster")
+                clusters[pore] = -2
+                # Stop growing all neighboring clusters
+                for r in ns:
+                    stopped[r] = True
+            else:
+                # Merge multiple un-stopped trapped clusters
+                ns = list(ns)
+                r = ns[0]
+                for c in ns[1:]:
+                    if verbose:
+                        logger.info(seq_pore + " C:5 merge clusters: " +
+                                    str(label[c]) + " into " + str(label[r]))
+                    if rank[r] < rank[c]:
+                        r, c = c, r
+                    elif rank[r] == rank[c]:
+                        rank[r] += 1
+                    parent[c] = r
+                    label[r] = min(label[r], label[c])
+                clusters[pore] = label[r]
+
+        # Replace the cluster numbers with the number of their set
+        clusters = np.array(clusters, dtype=int)
+        Cs = clusters >= 0
+        label = np.array(label, dtype=int)
+        roots = np.array([find(c) for c in range(Nc)], dtype=int)
+        clusters[Cs] = label[roots[clusters[Cs]]]
         # And now return clusters
         self['pore.clusters'] = clusters
         logger.info("Number of trapped clusters" +
                     str(np.sum(np.unique(clusters) >= 0)))
         self['pore.trapped'] = self['pore.clusters'] > -1
-        trapped_ts = self._net.find_neighbor_throats(self['pore.trapped'])
-        self['throat.trapped'] = np.zeros([self._net.Nt], dtype=bool)
-        self['throat.trapped'][trapped_ts] = True
+        conns = self._net['throat.conns']
+        self['throat.trapped'] = np.any(self['pore.trapped'][conns], axis=1)
         self['pore.invasion_sequence'][self['pore.trapped']] = np.inf
         self['throat.invasion_sequence'][self['throat.trapped']] = np.inf
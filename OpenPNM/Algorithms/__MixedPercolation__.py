@@ -15,6 +15,121 @@ import time
 logger = logging.getLogger(__name__)
 
 
+class _InvasionQueue(object):
+    r"""
+    Priority queue of invasion events used by MixedPercolation.
+
+    Each event is stored as a ``(pressure, code)`` tuple where the integer
+    code packs the element index, the element type and the invasion action.
+    Tuples compare in the same order as the ``[pressure, index, type,
+    action]`` lists used previously, with pores ranked before throats of the
+    same index, but avoid the per-entry list and string overhead.
+
+    Entries for elements that have already been invaded are not removed when
+    the element is invaded, they are skipped when popped (lazy deletion).
+    ``compact`` removes them in bulk using numpy.
+    """
+
+    _types = ['pore', 'throat']
+
+    def __init__(self, min_size=10000):
+        self._heap = []
+        self._min_size = min_size
+        self._compact_size = min_size
+
+    def __len__(self):
+        return len(self._heap)
+
+    @staticmethod
+    def _encode(elem_id, elem_type, action):
+        is_throat = elem_type == 'throat'
+        return ((elem_id*2 + is_throat)*8 + action + 1)
+
+    @staticmethod
+    def _decode(code):
+        elem_code, action = divmod(code, 8)
+        elem_id, is_throat = divmod(elem_code, 2)
+        return elem_id, is_throat, action - 1
+
+    def push(self, pressure, elem_id, elem_type, action):
+        r"""
+        Add a single event to the queue
+        """
+        code = self._encode(int(elem_id), elem_type, int(action))
+        hq.heappush(self._heap, (float(pressure), code))
+
+    def push_many(self, pressures, elem_ids, elem_type, action):
+        r"""
+        Add an event for each of the given elements, all of the same type and
+        with the same invasion action
+        """
+        codes = self._encode(np.asarray(elem_ids, dtype=np.int64),
+                             elem_type, action)
+        entries = zip(np.asarray(pressures, dtype=float).tolist(),
+                      codes.tolist())
+        heap = self._heap
+        if len(codes) > len(heap):
+            heap.extend(entries)
+            hq.heapify(heap)
+        else:
+            for entry in entries:
+                hq.heappush(heap, entry)
+
+    def peek(self):
+        r"""
+        Return the ``(pressure, code)`` key of the next event without
+        removing it
+        """
+        return self._heap[0]
+
+    def pop(self):
+        r"""
+        Remove and return the next event as a ``(pressure, elem_id,
+        elem_type, action)`` tuple
+        """
+        pressure, code = hq.heappop(self._heap)
+        elem_id, is_throat, action = self._decode(code)
+        return pressure, elem_id, self._types[is_throat], action
+
+    def to_arrays(self):
+        r"""
+        Return the queued events as parallel arrays of pressure, element
+        index, element type (0 for pores and 1 for throats) and action
+        """
+        if len(self._heap) == 0:
+            pressures = np.array([], dtype=float)
+            codes = np.array([], dtype=np.int64)
+        else:
+            pressures, codes = map(np.array, zip(*self._heap))
+        elem_codes, actions = np.divmod(codes.astype(np.int64), 8)
+        elem_ids, types = np.divmod(elem_codes, 2)
+        return pressures, elem_ids, types, actions - 1
+
+    def needs_compaction(self):
+        r"""
+        Whether the queue has doubled in size since it was last compacted
+        """
+        return len(self._heap) > 2*self._compact_size
+
+    def compact(self, pore_stale, throat_stale):
+        r"""
+        Drop all events for elements flagged in the given boolean masks
+        """
+        pressures, elem_ids, types, actions = self.to_arrays()
+        is_throat = types == 1
+        stale = np.zeros(len(self._heap), dtype=bool)
+        stale[~is_throat] = pore_stale[elem_ids[~is_throat]]
+        stale[is_throat] = throat_stale[elem_ids[is_throat]]
+        keep = ~stale
+        pressures = pressures[keep]
+        codes = ((elem_ids[keep]*2 + types[keep])*8 + actions[keep] + 1)
+        # A sorted list is a valid heap so no need to heapify
+        order = np.lexsort((codes, pressures))
+        self._heap = list(zip(pressures[order].tolist(),
+                              codes[order].tolist()))
+        self._compact_size = max(len(self._heap), self._min_size)
+
+
 class MixedPercolation(GenericAlgorithm):
     r"""
     A classic/basic invasion percolation algorithm optimized for speed.
@@ -61,6 +176,10 @@ class MixedPercolation(GenericAlgorithm):
             self['throat.entry_pressure'] = phase['throat.capillary_pressure']
             self._bi_directional = False
         self['pore.entry_pressure'] = phase['pore.capillary_pressure']
+        # Throats connected to each pore in compressed sparse row layout
+        im = self._net.create_incidence_matrix(sprsfmt='csr')
+        self._indptr = im.indptr
+        self._indices = im.indices
         self.reset_invasion_info()
         self._key_words = kwargs
         # Need to setup cooperative pore filling seperately
@@ -112,16 +231,14 @@ class MixedPercolation(GenericAlgorithm):
         except:
             inlet_inv_seq = -1
         for i, cluster in enumerate(clusters):
-            self.queue[i] = []
+            self.queue[i] = _InvasionQueue()
             # Perform initial analysis on input pores
             self['pore.inv_seq'][cluster] = inlet_inv_seq
             self['pore.cluster'][cluster] = i
             self['pore.inv_Pc'][cluster] = Pc_start
-            if np.size(cluster) > 1:
-                for elem_id in cluster:
+            if np.size(cluster) > 0:
+                for elem_id in np.array(cluster, ndmin=1):
                     self._add_ts2q(elem_id, self.queue[i], action=0)
-            elif np.size(cluster) == 1:
-                self._add_ts2q(cluster, self.queue[i], action=0)
             else:
                 logger.warning("Some inlet clusters have no pores")
         try:
@@ -142,65 +259,71 @@ class MixedPercolation(GenericAlgorithm):
         """
         Helper method to add throats to the queue
         """
-        elem_type = 'throat'
         # Find throats connected to newly invaded pore
-        Ts = self._net.find_neighbor_throats(pores=pore)
+        Ts = self._pore_throats(pore)
         # Remove already invaded throats from Ts
         Ts = Ts[self['throat.inv_seq'][Ts] <= 0]
-        tcp = self._phase['throat.capillary_pressure']
         if len(Ts) > 0:
             self._interface_Ts[Ts] = True
-            for T in Ts:
-                if self._bi_directional:
-                    # Get index of pore being invaded next and apply correct
-                    # entry pressure
-                    pmap = self._net['throat.conns'][T] != pore
-                    pind = list(pmap).index(True)
-                    self['throat.entry_pressure'][T] = tcp[T][pind]
-                data = []
-                # Pc
-                data.append(self['throat.entry_pressure'][T])
-                # Element Index
-                data.append(T)
-                # Element Type (Pore of Throat)
-                data.append(elem_type)
-                # Invasion Action - 0=Burst, 1=Coop, 2=Snap, 3=Touch??
-                data.append(action)
-                hq.heappush(queue, data)
+            if self._bi_directional:
+                # Get index of pore being invaded next and apply correct
+                # entry pressure
+                tcp = self._phase['throat.capillary_pressure']
+                pind = (self._net['throat.conns'][Ts, 0] == pore).astype(int)
+                self['throat.entry_pressure'][Ts] = tcp[Ts, pind]
+            # Invasion Action - 0=Burst, 1=Coop, 2=Snap, 3=Touch??
+            queue.push_many(self['throat.entry_pressure'][Ts], Ts,
+                            'throat', action)
+
+    def _pore_throats(self, pore):
+        r"""
+        Return the throats connected to a single pore
+        """
+        pore = int(pore)
+        return self._indices[self._indptr[pore]:self._indptr[pore+1]]
 
     def _add_ps2q(self, throat, queue, action=-1):
         """
         Helper method to add pores to the queue
         """
-        elem_type = 'pore'
         # Find pores connected to newly invaded throat
         Ps = self._net['throat.conns'][throat]
         # Remove already invaded pores from Ps
         Ps = Ps[self['pore.inv_seq'][Ps] <= 0]
         if len(Ps) > 0:
             self._interface_Ps[Ps] = True
-            for P in Ps:
-                data = []
-                # Pc
-                data.append(self["pore.entry_pressure"][P])
-                # Element Index
-                data.append(P)
-                # Element Type (Pore of Throat)
-                data.append(elem_type)
-                # Invasion Action - 0=Burst, 1=Coop, 2=Snap, 3=Touch??
-                data.append(action)
-                hq.heappush(queue, data)
-
-    def run(self, max_pressure=None, outlets=None, **kwargs):
+            # Invasion Action - 0=Burst, 1=Coop, 2=Snap, 3=Touch??
+            queue.push_many(self['pore.entry_pressure'][Ps], Ps, 'pore',
+                            action)
+
+    def run(self, max_pressure=None, outlets=None, mode='round_robin',
+            **kwargs):
         r"""
         Perform the algorithm
 
         Parameters
         ----------
-        n_steps : int
-            The number of throats to invaded during this step
+        max_pressure : float
+            The pressure at which the invasion stops
+
+        outlets : array_like
+            Pores at which an invading cluster stops once it reaches them
+
+        mode : string
+            How invasion proceeds when there are several inlet clusters.
+            Options are:
+
+            **'round_robin'** : (default) Each cluster invades one element
+            in turn, regardless of the pressure the others have reached.
+
+            **'global'** : All clusters share one event order and the lowest
+            pressure event of any cluster is processed next.  Clusters that
+            touch are merged into the lowest numbered one and carry on
+            invading with a shared pressure.
 
         """
+        if mode not in ['round_robin', 'global']:
+            raise Exception('Unrecognized mode: ' + str(mode))
         if 'inv_points' in kwargs.keys():
             Pc_start = kwargs['inv_points'][0]
         else:
@@ -224,17 +347,35 @@ class MixedPercolation(GenericAlgorithm):
         if len(self.queue.items()) == 0:
             logger.warn('queue is empty, this network is fully invaded')
             return
+        if mode == 'global':
+            self._run_global(max_pressure=max_pressure, outlets=outlets)
+            return
 
         max_p_reached = [False]*len(self.queue.items())
         count = -1
         invasion_running = [True]*len(self.queue.items())
         high_Pc = np.ones(len(self.queue.items()))*-np.inf
-        while np.any(invasion_running) and not np.all(max_p_reached):
+        # Fetch the arrays once rather than on every step
+        props = {}
+        for elem in ['pore', 'throat']:
+            props[elem] = [self[elem+'.'+prop] for prop in
+                           ['cluster', 'inv_seq', 'inv_Pc', 'action']]
+        # The first pass checks every throat, later passes only the throats
+        # of newly invaded pores
+        new_Ps = None
+        while any(invasion_running) and not all(max_p_reached):
             # Loop over clusters
             for c_num in self.queue.keys():
                 if invasion_running[c_num]:
                     queue = self.queue[c_num]
-                    pressure, elem_id, elem_type, action = hq.heappop(queue)
+                    if queue.needs_compaction():
+                        # Drop entries for elements this cluster has invaded
+                        queue.compact(props['pore'][0] == c_num,
+                                      props['throat'][0] == c_num)
+                        if len(queue) == 0:
+                            invasion_running[c_num] = False
+                            continue
+                    pressure, elem_id, elem_type, action = queue.pop()
                     if elem_type == 'pore':
                         self._interface_Ps[elem_id] = False
                     else:
@@ -242,8 +383,8 @@ class MixedPercolation(GenericAlgorithm):
                     if pressure > max_pressure:
                         max_p_reached[c_num] = True
                     else:
-                        elem_cluster = self[elem_type+'.cluster'][elem_id]
-                        elem_cluster = elem_cluster.astype(int)
+                        cluster, inv_seq, inv_Pc, inv_action = props[elem_type]
+                        elem_cluster = int(cluster[elem_id])
                         # Cluster is the uninvaded cluster
                         if elem_cluster == -1:
                             count += 1
@@ -252,13 +393,15 @@ class MixedPercolation(GenericAlgorithm):
                                 high_Pc[c_num] = pressure
                             # The newly invaded element is available for
                             # invasion
-                            self[elem_type+'.inv_seq'][elem_id] = count
-                            self[elem_type+'.cluster'][elem_id] = c_num
-                            self[elem_type+'.inv_Pc'][elem_id] = high_Pc[c_num]
-                            self[elem_type+'.action'][elem_id] = action
+                            inv_seq[elem_id] = count
+                            cluster[elem_id] = c_num
+                            inv_Pc[elem_id] = high_Pc[c_num]
+                            inv_action[elem_id] = action
                             if elem_type == 'throat':
                                 self._add_ps2q(elem_id, queue, action=0)
                             elif elem_type == 'pore':
+                                if new_Ps is not None:
+                                    new_Ps.append(elem_id)
                                 self._add_ts2q(elem_id, queue, action=0)
                                 if self._coop_fill:
                                     self._check_coop(elem_id, queue)
@@ -279,7 +422,7 @@ class MixedPercolation(GenericAlgorithm):
                             logger.info("Cluster " + str(c_num) +
                                         " terminated")
 
-                        elif self[elem_type+'.cluster'][elem_id] == c_num:
+                        elif elem_cluster == c_num:
                             # Self intersecting or repeating elements"
                             pass
                         else:
@@ -291,7 +434,13 @@ class MixedPercolation(GenericAlgorithm):
                         # If the cluster contains no more entries invasion has
                         # finished
                         invasion_running[c_num] = False
-            self._invade_isolated_Ts()
+            if new_Ps is None:
+                self._invade_isolated_Ts()
+                new_Ps = []
+            elif len(new_Ps) > 0:
+                Ts = [self._pore_throats(P) for P in new_Ps]
+                self._invade_isolated_Ts(throats=np.concatenate(Ts))
+                new_Ps = []
             if outlets is not None:
                 # terminated clusters
                 tcs = np.unique(self['pore.cluster'][outlets]).astype(int)
@@ -303,6 +452,118 @@ class MixedPercolation(GenericAlgorithm):
                             logger.info("Cluster " + str(tc) + " reached " +
                                         " outlet at sequence " + str(count))
 
+    def _run_global(self, max_pressure, outlets):
+        r"""
+        Invade from all clusters in order of increasing pressure.
+
+        The queue of each cluster is kept as is and the next event of each
+        one is held in a heap, so that the lowest event across all clusters
+        is always processed next.  Ties are broken by element and then by
+        cluster number so the outcome does not depend on the number of
+        clusters that are running.  Clusters are merged with a disjoint-set
+        forest, the root being the lowest cluster number, and the cluster
+        labels are updated once the invasion has finished.
+        """
+        n_clusters = len(self.queue.items())
+        parent = list(range(n_clusters))
+        high_Pc = [-np.inf]*n_clusters
+        running = [True]*n_clusters
+        props = {}
+        for elem in ['pore', 'throat']:
+            props[elem] = [self[elem+'.'+prop] for prop in
+                           ['cluster', 'inv_seq', 'inv_Pc', 'action']]
+        is_outlet = np.zeros(self.Np, dtype=bool)
+        if outlets is not None:
+            is_outlet[outlets] = True
+            tcs = np.unique(props['pore'][0][is_outlet])
+            for tc in tcs[tcs >= 0]:
+                running[tc] = False
+        heads = []
+        for c_num, queue in self.queue.items():
+            if len(queue) > 0 and running[c_num]:
+                heads.append(queue.peek() + (c_num, ))
+        hq.heapify(heads)
+        count = -1
+        first = True
+        while len(heads) > 0:
+            pressure, code, c_num = hq.heappop(heads)
+            root = c_num
+            while parent[root] != root:
+                parent[root] = parent[parent[root]]
+                root = parent[root]
+            if not running[root]:
+                continue
+            if pressure > max_pressure:
+                break
+            queue = self.queue[c_num]
+            pressure, elem_id, elem_type, action = queue.pop()
+            if elem_type == 'pore':
+                self._interface_Ps[elem_id] = False
+            else:
+                self._interface_Ts[elem_id] = False
+            cluster, inv_seq, inv_Pc, inv_action = props[elem_type]
+            elem_cluster = int(cluster[elem_id])
+            if elem_cluster == -1:
+                count += 1
+                if high_Pc[root] < pressure:
+                    high_Pc[root] = pressure
+                inv_seq[elem_id] = count
+                cluster[elem_id] = c_num
+                inv_Pc[elem_id] = high_Pc[root]
+                inv_action[elem_id] = action
+                if elem_type == 'throat':
+                    self._add_ps2q(elem_id, queue, action=0)
+                else:
+                    self._add_ts2q(elem_id, queue, action=0)
+                    if self._coop_fill:
+                        self._check_coop(elem_id, queue)
+                    if not first:
+                        Ts = self._pore_throats(elem_id)
+                        self._invade_isolated_Ts(throats=Ts)
+                    if is_outlet[elem_id]:
+                        running[root] = False
+                        logger.info("Cluster " + str(root) + " reached " +
+                                    " outlet at sequence " + str(count))
+            else:
+                other = elem_cluster
+                while parent[other] != other:
+                    parent[other] = parent[parent[other]]
+                    other = parent[other]
+                if other != root and running[other]:
+                    logger.info("Merging cluster " + str(max(root, other)) +
+                                " into cluster " + str(min(root, other)) +
+                                " at sequence " + str(count))
+                    high_Pc[min(root, other)] = max(high_Pc[root],
+                                                    high_Pc[other])
+                    parent[max(root, other)] = min(root, other)
+                    root = min(root, other)
+                elif other != root:
+                    # The cluster has reached one that has stopped invading
+                    running[root] = False
+                    logger.info("Cluster " + str(root) + " terminated")
+            if first:
+                self._invade_isolated_Ts()
+                first = False
+            if queue.needs_compaction():
+                # Drop entries for elements this cluster has invaded
+                queue.compact(props['pore'][0] == c_num,
+                              props['throat'][0] == c_num)
+            if len(queue) > 0 and running[root]:
+                hq.heappush(heads, queue.peek() + (c_num, ))
+        # Label every element with the cluster it was merged into
+        roots = []
+        for c_num in range(n_clusters):
+            root = c_num
+            while parent[root] != root:
+                parent[root] = parent[parent[root]]
+                root = parent[root]
+            roots.append(root)
+        roots = np.array(roots, dtype=int)
+        for elem in ['pore', 'throat']:
+            cluster = props[elem][0]
+            invaded = cluster >= 0
+            cluster[invaded] = roots[cluster[invaded].astype(int)]
+
     def return_results(self, pores=[], throats=[], Pc=None):
         r"""
         Places the results of the IP simulation into the Phase object.
@@ -639,9 +900,8 @@ class MixedPercolation(GenericAlgorithm):
         try:
             Pc_snap_off = self._phase[snap_off]
             logger.info("Adding snap off pressures to queue")
-            for T in self._net.throats():
-                if not np.isnan(Pc_snap_off[T]):
-                    hq.heappush(queue, [Pc_snap_off[T], T, 'throat', 2])
+            Ts = self._net.throats()[~np.isnan(Pc_snap_off)]
+            queue.push_many(Pc_snap_off[Ts], Ts, 'throat', 2)
         except:
             logger.warning("Phase " + self._phase.name + " doesn't have " +
                            "property " + snap_off)
@@ -678,19 +938,27 @@ class MixedPercolation(GenericAlgorithm):
         return np.cross(vec, [1, 1, 1])
 
     def _circ_points(self, a, b, c):
-        t = np.arange(0, 2*np.pi, 0.1)
-        pts = []
-        for i in range(3):
-            pts.append(c[i] + a[i]*np.sin(t) + b[i]*np.cos(t))
-        return np.asarray(pts).T
+        r"""
+        Points around the circles with centres c and perpendicular radius
+        vectors a and b, each given as an array of shape (N, 3)
+        """
+        t = np.arange(0, 2*np.pi, 0.1)[np.newaxis, :, np.newaxis]
+        a = a[:, np.newaxis, :]
+        b = b[:, np.newaxis, :]
+        c = c[:, np.newaxis, :]
+        return c + a*np.sin(t) + b*np.cos(t)
 
-    def _check_intersection(self, c1, c2, r1, r2, pore_center, pore_rad):
+    def _check_intersection(self, c1, c2, r1, r2, pore_center, pore_rad,
+                            chunk_size=10000):
         r"""
         Helper function to determine whether the intersetion between two
         Spheres formed by growing menisci in the throats lies within the pore
-        body that they connect to
+        body that they connect to.  The pore center and radius can either be
+        given for a single pore or for each pair of spheres.
         """
         intersection = np.zeros(len(r1), dtype=bool)
+        pore_center = np.broadcast_to(pore_center, (len(r1), 3))
+        pore_rad = np.broadcast_to(pore_rad, (len(r1), ))
         vec_n = c2 - c1
         dist = np.linalg.norm(vec_n, axis=1)
         vec_a = self._perpendicular_vector(vec_n)
@@ -703,20 +971,22 @@ class MixedPercolation(GenericAlgorithm):
         # intersection centre
         p = c1 + (vec_n.T*(x/dist)).T
         sq = 4 * dist**2 * r1**2 - (dist**2 - r2**2 + r1**2)**2
-        # Could try to vectorize this but it would be pretty complicated!!!
-        for i in range(len(r1)):
-            if sq[i] > 0:
-                # An intersection is found
-                rad = (1/(2*dist[i]))*np.sqrt(sq[i])
-                # Points around circle
-                circle = self._circ_points(vec_a[i]*rad, vec_b[i]*rad, p[i])
-                # If any points on the circle defining the intersection
-                # Are within the pore radius distance from the pore center
-                # The intersection is inside the pore - Not exact as pores
-                # Are irregular shapes
-                c2p = np.linalg.norm(circle-pore_center, axis=1)
-                if np.any(c2p < pore_rad):
-                    intersection[i] = True
+        # An intersection is found where sq is positive, points around the
+        # circle are generated in chunks to limit memory use
+        found = np.where(sq > 0)[0]
+        for start in range(0, len(found), chunk_size):
+            i = found[start:start+chunk_size]
+            rad = (1/(2*dist[i]))*np.sqrt(sq[i])
+            circle = self._circ_points(vec_a[i]*rad[:, np.newaxis],
+                                       vec_b[i]*rad[:, np.newaxis],
+                                       p[i])
+            # If any points on the circle defining the intersection
+            # Are within the pore radius distance from the pore center
+            # The intersection is inside the pore - Not exact as pores
+            # Are irregular shapes
+            c2p = np.linalg.norm(circle-pore_center[i][:, np.newaxis, :],
+                                 axis=2)
+            intersection[i] = np.any(c2p < pore_rad[i][:, np.newaxis], axis=1)
 
         return intersection
 
@@ -728,6 +998,14 @@ class MixedPercolation(GenericAlgorithm):
         angle between their throat planes.
         This is used when the invading fluid has access to multiple throats
         connected to a pore
+
+        Notes
+        -----
+        All pairs of throats sharing a pore are checked together for each
+        capillary pressure in ``inv_points``.  The lowest pressure at which
+        each pair can cooperatively fill the pore is stored in a sparse table
+        with an entry for each throat of the pair, so that ``_check_coop``
+        can look up the partners of a throat directly.
         """
         from OpenPNM.Physics import models as pm
         try:
@@ -739,11 +1017,6 @@ class MixedPercolation(GenericAlgorithm):
             inv_points = np.arange(0, 30100, 500)
         if pores is None:
             pores = range(self.Np)
-        # Throat-Throat cooperative filling pressure
-        self.tt_Pc = np.ndarray([self.Nt, self.Nt], dtype=float)
-        self.tt_Pc.fill(sp.nan)
-        # Dictionary with keys of capillary pressure
-        self.coop_data = {}
         start = time.time()
         tfill_angle = 'throat.filling_angle'
         tmen_rad = 'throat.meniscus_radius'
@@ -773,9 +1046,33 @@ class MixedPercolation(GenericAlgorithm):
         else:
             logger.exception('capillary model '+capillary_model+' not valid')
 
+        # Each entry of the incidence matrix is a pore-throat connection
+        indptr = self._indptr
+        e_throats = self._indices
+        e_pores = np.repeat(np.arange(self.Np), np.diff(indptr))
+        # Unit normals of each throat pointing into the connected pore
+        unit = np.linalg.norm(t_norms, axis=1)
+        e_normals = t_norms[e_throats]/unit[e_throats][:, np.newaxis]
+        e_centres = t_centroids[e_throats]
+        v = p_centroids[e_pores] - e_centres
+        e_sign = np.sign(np.sum(v*e_normals, axis=1))
+        # Pair every entry with the entries following it in the same row
+        # to give all the pairs of throats sharing a pore
+        n_after = (indptr[e_pores+1] - np.arange(len(e_pores)) - 1)
+        e1 = np.repeat(np.arange(len(e_pores)), n_after)
+        offset = np.arange(len(e1)) - np.repeat(np.cumsum(n_after) - n_after,
+                                                n_after)
+        e2 = e1 + 1 + offset
+        keep = np.zeros(self.Np, dtype=bool)
+        keep[pores] = True
+        keep = keep[e_pores[e1]]
+        e1 = e1[keep]
+        e2 = e2[keep]
+        pair_Pc = np.ones(len(e1))*sp.nan
+        # Pairs which have not yet been found to coop fill
+        todo = np.arange(len(e1))
+
         for Pc in inv_points:
-            # Dictionary with keys of pore id
-            pore_data = {}
             if capillary_model == 'purcell':
                 phys.add_model(propname=tfill_angle,
                                model=angle_model,
@@ -797,77 +1094,60 @@ class MixedPercolation(GenericAlgorithm):
                 phys[tfill_angle] = phys['throat.men_data']['alpha']
                 phys[tmen_rad] = phys['throat.men_data']['rad']
                 phys[tmen_cen] = phys['throat.men_data']['cen']
+            if len(todo) == 0:
+                continue
+            cen = phys[tmen_cen][e_throats]
+            c3 = np.vstack((cen*e_sign, cen*e_sign, cen*e_sign)).T
+            men_cen = e_centres + c3*e_normals
+            c1 = men_cen[e1[todo]]
+            c2 = men_cen[e2[todo]]
+            c2c = (c1-c2)
+            dist = np.linalg.norm(c2c, axis=1)
+            t1 = e_throats[e1[todo]]
+            t2 = e_throats[e2[todo]]
+            r1 = phys[tmen_rad][t1]
+            r2 = phys[tmen_rad][t2]
+            # nans may exist if pressure is outside the range
+            # set these to zero to be ignored by next step without
+            # causing RuntimeWarning
+            r1[sp.isnan(r1)] = 0
+            r2[sp.isnan(r2)] = 0
+            check_pos = np.logical_and(r1 > 0, r2 > 0)
+            # simple initial distance check on sphere rads
+            check_rads = (r1+r2) >= dist
+            # check whether the filling angle is ok at this Pc
+            check_alpha_t1 = ~sp.isnan(phys[tfill_angle][t1])
+            check_alpha_t2 = ~sp.isnan(phys[tfill_angle][t2])
+            check_alpha = check_alpha_t1*check_alpha_t2
+            mask = check_pos*check_alpha*check_rads
+            # if all checks pass
+            if np.any(mask):
+                # Check if intersecting circle lies within pore
+                pair_pores = e_pores[e1[todo[mask]]]
+                inter = self._check_intersection(c1=c1[mask],
+                                                 c2=c2[mask],
+                                                 r1=r1[mask],
+                                                 r2=r2[mask],
+                                                 pore_center=p_centroids[
+                                                     pair_pores],
+                                                 pore_rad=p_diam[
+                                                     pair_pores]/2)
+                pair_Pc[todo[mask][inter]] = Pc
+                todo = todo[sp.isnan(pair_Pc[todo])]
 
-            for pore in pores:
-                # Dictionary with keys of throat id
-                throat_data = {}
-                p_cen = p_centroids[pore]
-                p_rad = p_diam[pore]/2
-                throats = self._net.find_neighbor_throats(pores=pore,
-                                                          flatten=True)
-                throat_centres = t_centroids[throats]
-                throat_normals = t_norms[throats]
-                unit = np.linalg.norm(throat_normals, axis=1)
-                throat_normals /= np.vstack((unit, unit, unit)).T
-                v = p_cen - throat_centres
-                sign = np.sign(np.sum(v*throat_normals, axis=1))
-                cen = phys[tmen_cen][throats]
-                c3 = np.vstack((cen*sign, cen*sign, cen*sign)).T
-                men_cen = throat_centres + c3*throat_normals
-                pairs = []
-                for i, T in enumerate(throats):
-                    men_data = {}
-                    men_data['cen'] = men_cen[i]
-                    men_data['rad'] = phys[tmen_rad][T]
-                    men_data['offset'] = phys[tmen_cen][T]
-                    men_data['alpha'] = phys[tfill_angle][T]
-                    throat_data[T] = men_data
-                for ni in range(len(throats)):
-                    for nj in range(len(throats))[ni+1:]:
-                        pairs.append([ni, nj])
-                pairs = np.asarray(pairs)
-                if len(pairs) > 0:
-                    c1 = men_cen[pairs[:, 0]]
-                    c2 = men_cen[pairs[:, 1]]
-                    c2c = (c1-c2)
-                    dist = np.linalg.norm(c2c, axis=1)
-                    t1 = throats[pairs[:, 0]]
-                    t2 = throats[pairs[:, 1]]
-                    r1 = phys[tmen_rad][t1]
-                    r2 = phys[tmen_rad][t2]
-                    # nans may exist if pressure is outside the range
-                    # set these to zero to be ignored by next step without
-                    # causing RuntimeWarning
-                    r1[sp.isnan(r1)] = 0
-                    r2[sp.isnan(r2)] = 0
-                    check_pos = np.logical_and(r1 > 0, r2 > 0)
-                    # simple initial distance check on sphere rads
-                    check_rads = (r1+r2) >= dist
-                    # check whether the filling angle is ok at this Pc
-                    check_alpha_t1 = ~sp.isnan(phys[tfill_angle][t1])
-                    check_alpha_t2 = ~sp.isnan(phys[tfill_angle][t2])
-                    check_alpha = check_alpha_t1*check_alpha_t2
-                    # check whether this throat pair already has a coop value
-                    check_nans = sp.isnan(self.tt_Pc[t1, t2])
-                    mask = check_pos*check_alpha*check_nans*check_rads
-                    # if all checks pass
-                    if np.any(mask):
-                        # Check if intersecting circle lies within pore
-                        inter = self._check_intersection(c1=c1[mask],
-                                                         c2=c2[mask],
-                                                         r1=r1[mask],
-                                                         r2=r2[mask],
-                                                         pore_center=p_cen,
-                                                         pore_rad=p_rad)
-                        if np.any(inter):
-                            self.tt_Pc[t1[mask][inter], t2[mask][inter]] = Pc
-                            self.tt_Pc[t2[mask][inter], t1[mask][inter]] = Pc
-                        # intersection
-                    # pairs of mensici
-                # pore
-                pore_data[pore] = throat_data
-            # Pc
-            self.coop_data[Pc] = pore_data
+        # Store the coop filling pressure against both throats of each pair
+        found = ~sp.isnan(pair_Pc)
+        t1 = e_throats[e1[found]]
+        t2 = e_throats[e2[found]]
+        common = e_pores[e1[found]]
+        Pcs = pair_Pc[found]
+        throats = np.concatenate((t1, t2))
+        order = np.argsort(throats, kind='mergesort')
+        counts = np.bincount(throats, minlength=self.Nt)
+        self._coop_indptr = np.concatenate(([0], np.cumsum(counts)))
+        self._coop_throats = np.concatenate((t2, t1))[order]
+        self._coop_pores = np.concatenate((common, common))[order]
+        self._coop_Pc = np.concatenate((Pcs, Pcs))[order]
         # Finished
         logger.info("Coop filling finished in " +
                     str(np.around(time.time()-start, 2)) + " s")
@@ -881,60 +1161,61 @@ class MixedPercolation(GenericAlgorithm):
         The invasion of the throats connected to the common pore is handled
         elsewhere.
         """
-        for throat in self._net.find_neighbor_throats(pores=pore):
+        conns = self._net['throat.conns']
+        inv_seq = self['pore.inv_seq']
+        for throat in self._pore_throats(pore):
             # A pore has just been invaded, all it's throats now have
             # An interface residing inside them
             if self['throat.inv_seq'][throat] == -1:
-                # If the throat is not the invading throat that gave access
-                # to this pore, get the pores that this throat connects with
-                a = set(self._net['throat.conns'][throat])
-                # Get a list of pre-calculated coop filling pressures for all
-                # Throats this throat can coop fill with
-                ts_Pc = self.tt_Pc[throat]
-                ts = np.argwhere(~np.isnan(ts_Pc))
+                # Get the pre-calculated coop filling pressures for all
+                # Throats this throat can coop fill with, and the common pore
+                # (cP) they share
+                row = slice(self._coop_indptr[throat],
+                            self._coop_indptr[throat+1])
+                ts = self._coop_throats[row]
                 # If there are any potential coop filling throats
                 if len(ts) > 0:
-                    # For each throat find the common pore and the uncommon
-                    # pores
-                    for t in ts.flatten():
-                        # Find common pore (cP) and uncommon pores (uPs)
-                        b = set(self._net['throat.conns'][t])
-                        cP = list(a.intersection(b))
-                        uPs = list(a.symmetric_difference(b))
-                        # If the common pore is not invaded but the others are
-                        # The potential coop filling event can now happen
-                        # Add the coop pressure to the queue
-                        if ((np.all(self['pore.inv_seq'][uPs] > -1)) and
-                           (self['pore.inv_seq'][cP] == -1)):
-                            # Coop pore filling fills the common pore
-                            # The throats that gave access are not invaded now
-                            # However, isolated throats between invaded pores
-                            # Are taken care of elsewhere...
-                            # This could result in cyclycally calling the
-                            # functio.
-                            # If all elements are added to the queue and this
-                            # function does not have access to the invasion seq
-                            hq.heappush(queue, [ts_Pc[t], list(cP), 'pore', 1])
-
-    def _invade_isolated_Ts(self):
+                    cPs = self._coop_pores[row]
+                    # Find the uncommon pores (uPs) of each pair
+                    uP1 = np.sum(conns[throat]) - cPs
+                    uP2 = np.sum(conns[ts], axis=1) - cPs
+                    # If the common pore is not invaded but the others are
+                    # The potential coop filling event can now happen
+                    # Add the coop pressure to the queue
+                    # Coop pore filling fills the common pore
+                    # The throats that gave access are not invaded now
+                    # However, isolated throats between invaded pores
+                    # Are taken care of elsewhere...
+                    ready = ((inv_seq[uP1] > -1) * (inv_seq[uP2] > -1) *
+                             (inv_seq[cPs] == -1))
+                    if np.any(ready):
+                        queue.push_many(self._coop_Pc[row][ready],
+                                        cPs[ready], 'pore', 1)
+
+    def _invade_isolated_Ts(self, throats=None):
         r"""
         Throats that are uninvaded connected to pores that are both invaded
-        should be invaded too.
+        should be invaded too.  Only the given throats are checked if
+        supplied.
         """
-        Ts = self._net['throat.conns'].copy()
+        if throats is None:
+            throats = self._net.throats()
+        Ts = self._net['throat.conns'][throats]
         invaded_Ps = self['pore.inv_seq'] > -1
-        uninvaded_Ts = self['throat.inv_seq'] == -1
+        uninvaded_Ts = self['throat.inv_seq'][throats] == -1
         isolated_Ts = np.logical_and(invaded_Ps[Ts[:, 0]],
                                      invaded_Ps[Ts[:, 1]])
         isolated_Ts = np.logical_and(isolated_Ts, uninvaded_Ts)
         inv_Pc = self['pore.inv_Pc']
         if np.any(isolated_Ts):
+            Ts = Ts[isolated_Ts]
+            throats = throats[isolated_Ts]
             Pc = np.max(inv_Pc[Ts], axis=1)
             seq = np.max(inv_Pc[Ts], axis=1)
             max_array = Ts[:, 0]
             second_higher = inv_Pc[Ts][:, 1] > inv_Pc[Ts][:, 0]
             max_array[second_higher] = Ts[:, 1][second_higher]
             action = self['pore.action'][max_array]
-            self['throat.inv_Pc'][isolated_Ts] = Pc[isolated_Ts]
-            self['throat.inv_seq'][isolated_Ts] = seq[isolated_Ts]
-            self['throat.action'][isolated_Ts] = action[isolated_Ts]
+            self['throat.inv_Pc'][throats] = Pc
+            self['throat.inv_seq'][throats] = seq
+            self['throat.action'][throats] = action
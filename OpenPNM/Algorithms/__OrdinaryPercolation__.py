@@ -172,11 +172,16 @@ class OrdinaryPercolation(GenericAlgorithm):
         self._do_outer_iteration_stage(inv_points)
 
     def _do_outer_iteration_stage(self, inv_points):
-        # Generate curve from points
-        for inv_val in inv_points:
-            # Apply one applied pressure and determine invaded pores
-            logger.info('Applying capillary pressure: ' + str(inv_val))
-            self._do_one_inner_iteration(inv_val)
+        inv_points = sp.array(inv_points, dtype=float, ndmin=1)
+        if sp.all(sp.diff(inv_points) >= 0):
+            # Invasion is monotone so clusters can be grown incrementally
+            self._do_incremental_invasion(inv_points)
+        else:
+            # Generate curve from points
+            for inv_val in inv_points:
+                # Apply one applied pressure and determine invaded pores
+                logger.info('Applying capillary pressure: ' + str(inv_val))
+                self._do_one_inner_iteration(inv_val)
 
         # Find invasion sequence values (to correspond with IP algorithm)
         self['pore.inv_seq'] = sp.searchsorted(sp.unique(self['pore.inv_Pc']),
@@ -225,6 +230,152 @@ class OrdinaryPercolation(GenericAlgorithm):
         self['pore.inv_sat'][pinds] = (tsat + psat)/total
         self['throat.inv_sat'][tinds] = (tsat + psat)/total
 
+    def _do_incremental_invasion(self, inv_points):
+        r"""
+        Determine the pressure at which each pore and throat is invaded for an
+        increasing list of applied capillary pressures.
+
+        Notes
+        -----
+        This gives the same result as calling ``_do_one_inner_iteration`` at
+        each pressure, but instead of labelling the clusters from scratch at
+        every point the throats are sorted by entry pressure once and added
+        to a disjoint-set forest (union by size with path halving) in order.
+        Each cluster keeps circular linked lists of its pores and of its
+        not-yet-invaded throats, so when a cluster first connects to an inlet
+        its members are marked without scanning the whole network.  The total
+        cost is nearly linear in the number of throats regardless of the number
+        of pressure points.
+        """
+        net = self._net
+        Np = net.num_pores()
+        conns = net['throat.conns']
+        npts = sp.size(inv_points)
+        if self._percolation_type == 'bond':
+            t_entry = self['throat.entry_pressure']
+        else:
+            p_entry = self['pore.entry_pressure']
+            # A throat is invaded once both of its pores are invaded
+            t_entry = sp.amax(p_entry[conns], axis=1)
+            p_sorted = sp.argsort(p_entry, kind='mergesort')
+            p_stops = sp.searchsorted(p_entry[p_sorted], inv_points,
+                                      side='right')
+            p_sorted = p_sorted.tolist()
+        t_sorted = sp.argsort(t_entry, kind='mergesort')
+        t_stops = sp.searchsorted(t_entry[t_sorted], inv_points, side='right')
+        t_sorted = t_sorted.tolist()
+        if self._AL:
+            inlets = self['pore.inlets'].tolist()
+        else:
+            # All clusters are invasion sites
+            inlets = [True]*Np
+        conns = conns.tolist()
+        parent = list(range(Np))
+        size = [1]*Np
+        active = [False]*Np
+        invaded = [False]*Np
+        p_next = list(range(Np))
+        t_next = [-1]*len(conns)
+        t_head = [-1]*Np
+        p_step = [-1]*Np
+        t_step = [-1]*len(conns)
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        def invade(r, step):
+            # Mark all pores and throats of cluster r as invaded
+            invaded[r] = True
+            i = r
+            while True:
+                p_step[i] = step
+                i = p_next[i]
+                if i == r:
+                    break
+            t0 = t_head[r]
+            if t0 >= 0:
+                t = t0
+                while True:
+                    t_step[t] = step
+                    t = t_next[t]
+                    if t == t0:
+                        break
+                t_head[r] = -1
+
+        p_start = 0
+        t_start = 0
+        for step in range(npts):
+            logger.info('Applying capillary pressure: ' +
+                        str(inv_points[step]))
+            if self._percolation_type == 'site':
+                for p in p_sorted[p_start:p_stops[step]]:
+                    active[p] = True
+                    if inlets[p]:
+                        invade(p, step)
+                p_start = p_stops[step]
+            for t in t_sorted[t_start:t_stops[step]]:
+                a, b = conns[t]
+                new_inlet = False
+                for p in (a, b):
+                    if not active[p]:
+                        # Only reached in bond percolation
+                        active[p] = True
+                        new_inlet = new_inlet or inlets[p]
+                ra = find(a)
+                rb = find(b)
+                if ra != rb:
+                    if size[ra] < size[rb]:
+                        ra, rb = rb, ra
+                    if invaded[ra] != invaded[rb]:
+                        if invaded[ra]:
+                            invade(rb, step)
+                        else:
+                            invade(ra, step)
+                    parent[rb] = ra
+                    size[ra] += size[rb]
+                    # Splice the member lists of rb into those of ra
+                    p_next[ra], p_next[rb] = p_next[rb], p_next[ra]
+                    if t_head[rb] >= 0:
+                        if t_head[ra] >= 0:
+                            ta = t_head[ra]
+                            tb = t_head[rb]
+                            t_next[ta], t_next[tb] = t_next[tb], t_next[ta]
+                        else:
+                            t_head[ra] = t_head[rb]
+                        t_head[rb] = -1
+                if invaded[ra]:
+                    t_step[t] = step
+                else:
+                    if t_head[ra] >= 0:
+                        t_next[t] = t_next[t_head[ra]]
+                        t_next[t_head[ra]] = t
+                    else:
+                        t_next[t] = t
+                        t_head[ra] = t
+                    if new_inlet:
+                        invade(ra, step)
+            t_start = t_stops[step]
+
+        p_step = sp.array(p_step)
+        t_step = sp.array(t_step)
+        # Store applied pressure in newly invaded pores and throats
+        pinds = (self['pore.inv_Pc'] == sp.inf) * (p_step >= 0)
+        self['pore.inv_Pc'][pinds] = inv_points[p_step[pinds]]
+        tinds = (self['throat.inv_Pc'] == sp.inf) * (t_step >= 0)
+        self['throat.inv_Pc'][tinds] = inv_points[t_step[tinds]]
+        # Store total network saturation at each applied pressure
+        Pc = sp.concatenate((self['pore.inv_Pc'], self['throat.inv_Pc']))
+        vol = sp.concatenate((net['pore.volume'], net['throat.volume']))
+        inds = sp.argsort(Pc, kind='mergesort')
+        cum_vol = sp.concatenate(([0], sp.cumsum(vol[inds])))
+        sat = cum_vol[sp.searchsorted(Pc[inds], inv_points, side='right')]
+        sat = sat/sp.sum(vol)
+        self['pore.inv_sat'][pinds] = sat[p_step[pinds]]
+        self['throat.inv_sat'][tinds] = sat[t_step[tinds]]
+
     def evaluate_trapping(self, p_outlets):
         r"""
         Finds trapped pores and throats after a full ordinary
@@ -250,33 +401,46 @@ class OrdinaryPercolation(GenericAlgorithm):
             inv_points = sp.unique(self['pore.inv_Pc'])
         except:
             raise Exception('Orindary percolation has not been run!')
-        tind = self._net.throats()
-        conns = self._net.find_connected_pores(tind)
-        for inv_val in inv_points[0:-1]:
-            # Find clusters of defender pores
-            Pinvaded = self['pore.inv_Pc'] <= inv_val
-            Cstate = sp.sum(Pinvaded[conns], axis=1)
-            Tinvaded = self['throat.inv_Pc'] <= inv_val
-            # 0 = all open, 1=1 pore filled,
-            # 2=2 pores filled 3=2 pores + 1 throat filled
-            Cstate = Cstate + Tinvaded
-            clusters = self._net.find_clusters(Cstate == 0)
-            # Clean up clusters (invaded = -1, defended >=0)
-            clusters = clusters * (~Pinvaded) - (Pinvaded)
-            # Identify clusters connected to outlet sites
-            out_clusters = sp.unique(clusters[p_outlets])
-            trapped_pores = ~sp.in1d(clusters, out_clusters)
-            trapped_pores[Pinvaded] = False
-            if sum(trapped_pores) > 0:
-                inds = (self['pore.trapped'] == 0) * trapped_pores
-                self['pore.trapped'][inds] = inv_val
-                trapped_throats = self._net.find_neighbor_throats(trapped_pores)
-                trapped_throat_array = np.asarray([False] * len(Cstate))
-                trapped_throat_array[trapped_throats] = True
-                inds = (self['throat.trapped'] == 0) * trapped_throat_array
-                self['throat.trapped'][inds] = inv_val
-                inds = (self['throat.trapped'] == 0) * (Cstate == 2)
-                self['throat.trapped'][inds] = inv_val
+        levels = inv_points[0:-1]
+        if sp.size(levels) == 0:
+            return
+        outlets = sp.zeros([self.Np, ], dtype=bool)
+        outlets[p_outlets] = True
+        p_inv = self['pore.inv_Pc']
+        t_inv = self['throat.inv_Pc']
+        conns = self._net['throat.conns']
+        # Defending throats are lost once either pore or the throat is invaded
+        t_time = sp.amin(sp.vstack((p_inv[conns].T, t_inv)), axis=0)
+        o_time = sp.where(outlets, p_inv, -sp.inf)
+        step = self._find_outlet_connection(levels, t_time, o_time)
+        # Pores are trapped at the step after they last reach an outlet
+        step = step + 1
+        Ps = step < sp.size(levels)
+        Ps[Ps] = levels[step[Ps]] < p_inv[Ps]
+        self['pore.trapped'][Ps] = levels[step[Ps]]
+        # Count the trapped pores at each step
+        p_end = sp.searchsorted(levels, p_inv[Ps], side='left')
+        n_trapped = sp.bincount(step[Ps], minlength=sp.size(levels)+1) - \
+            sp.bincount(p_end, minlength=sp.size(levels)+1)
+        n_trapped = sp.cumsum(n_trapped)[:-1]
+        # Throats are trapped along with the first of their pores
+        Pt = sp.ones([self.Np, ])*sp.inf
+        Pt[Ps] = levels[step[Ps]]
+        Tt = sp.amin(Pt[conns], axis=1)
+        # Uninvaded throats between two invaded pores are also trapped, but
+        # only at steps where some pore is trapped
+        next_step = sp.where(n_trapped > 0, sp.arange(sp.size(levels)),
+                             sp.size(levels))
+        next_step = sp.minimum.accumulate(next_step[::-1])[::-1]
+        next_step = sp.append(next_step, sp.size(levels))
+        t_step = sp.searchsorted(levels, sp.amax(p_inv[conns], axis=1),
+                                 side='left')
+        t_step = next_step[t_step]
+        Ts = t_step < sp.size(levels)
+        Ts[Ts] = levels[t_step[Ts]] < t_inv[Ts]
+        Tt[Ts] = sp.minimum(Tt[Ts], levels[t_step[Ts]])
+        Ts = Tt < sp.inf
+        self['throat.trapped'][Ts] = Tt[Ts]
         self['pore.inv_Pc'][self['pore.trapped'] > 0] = sp.inf
         self['throat.inv_Pc'][self['throat.trapped'] > 0] = sp.inf
 
@@ -24,30 +24,137 @@ class Tortuosity(GenericAlgorithm):
     r"""
     Determines the tortuosity of the network using a shortest path search algorithm.
 
+    Notes
+    -----
+    Three modes are available in ``run``:
+
+    **'all'** : (default) The tortuosity between all pairs of pores, returned
+    as a dense Np-by-Np array.  This requires O(Np^2) memory so is only
+    suitable for small networks.
+
+    **'faces'** : The tortuosity of the shortest path reaching each outlet
+    pore from any of the inlet pores, found with a single multi-source
+    Dijkstra search.
+
+    **'sampled'** : An estimate of the all-pairs tortuosity based on the
+    shortest paths from a random sample of source pores.  The sources are
+    processed in chunks and reduced to summary statistics, so memory remains
+    O(Np).
+
     """
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         logger.debug('Create Tortuosity Object')
 
-    def estimate_time(self):
+    def estimate_time(self, mode='all', n_samples=100, chunk_size=50):
+        r"""
+        Estimates the time and memory required by ``run``, based on the
+        performance of this PC on a small test network.
+
+        Parameters
+        ----------
+        mode : string
+            The mode of ``run`` to estimate, either 'all', 'faces' or
+            'sampled'.
+
+        n_samples and chunk_size : int
+            The number of sampled source pores and the number of sources
+            processed at once in 'sampled' mode.
+
+        Returns
+        -------
+        A dictionary containing the estimated 'time' in seconds and 'memory'
+        in bytes.
+        """
         pn_temp = OpenPNM.Network.TestNet()
         graph = pn_temp.create_adjacency_matrix(sprsfmt='csr')
-        self._net.tic()
+        misc.tic()
         path = spgr.shortest_path(csgraph=graph, method='D', directed=False)
-        t = self._net.toc(quiet=True)
+        t = misc.toc(quiet=True)
         N = 125
         k = 6
         O = t / (N * (N * k + N * sp.log(N)))
         N = self._net.num_pores()
+        Nt = self._net.num_throats()
         k = sp.median(self._net.num_neighbors(pores=self._net.pores()))
-        t_est = O * (N * (N * k + N * sp.log(N)))
+        # Cost of a single source Dijkstra search
+        t_single = O * (N * k + N * sp.log(N))
+        # Memory of the sparse graph plus a few Np-long arrays
+        m_graph = 2 * Nt * (8 + 4) + (N + 1) * 4
+        if mode == 'all':
+            t_est = N * t_single
+            # path, Cx, Cy, Cz, Ds and their ratio are all Np x Np
+            m_est = 6 * N**2 * 8 + m_graph
+        elif mode == 'faces':
+            t_est = t_single
+            m_est = m_graph + 6 * N * 8
+        elif mode == 'sampled':
+            n_samples = min(n_samples, N)
+            chunk_size = min(chunk_size, n_samples)
+            t_est = n_samples * t_single
+            # distances, straight-line lengths and their ratio for one chunk
+            m_est = m_graph + 4 * chunk_size * N * 8
+        else:
+            raise Exception('Unrecognized mode: ' + str(mode))
         logger.info('Based on the network size and PC performance, ' +
-                    'this algorithm will require: ', t_est, ' seconds')
-        return
+                    'this algorithm will require: ' + str(t_est) +
+                    ' seconds and ' + str(m_est) + ' bytes')
+        return {'time': t_est, 'memory': m_est}
 
-    def run(self, phase=None, throats=None):
-        logger.warning('This algorithm can take some time...')
+    def run(self, phase=None, throats=None, mode='all', inlets=None,
+            outlets=None, n_samples=100, chunk_size=50, seed=None):
+        r"""
+        Computes the tortuosity of the network
+
+        Parameters
+        ----------
+        phase : OpenPNM Phase object, optional
+            If given, and the phase has 'throat.occupancy', only the throats
+            occupied by the phase are used in the search.
+
+        mode : string
+            Controls which paths are considered.  Options are 'all' (default),
+            'faces' and 'sampled' (see Notes of the class).
+
+        inlets and outlets : array_like or string
+            The inlet and outlet pores, or labels thereof, used in 'faces'
+            mode.
+
+        n_samples : int
+            The number of randomly selected source pores used in 'sampled'
+            mode.
+
+        chunk_size : int
+            The number of source pores searched at once in 'sampled' mode,
+            which controls the memory requirement (chunk_size x Np).
+
+        seed : int, optional
+            The seed for the random selection of source pores in 'sampled'
+            mode.
+
+        Returns
+        -------
+        In 'all' mode an Np-by-Np array of tortuosities between each pair of
+        pores.  In 'faces' mode an array with the tortuosity of each outlet
+        pore (NaN if it cannot be reached).  In 'sampled' mode a dictionary
+        containing the 'mean', 'std' and 'count' of the sampled tortuosities.
+        """
+        graph = self._build_graph(phase=phase)
+        if mode == 'all':
+            return self._run_all(graph)
+        elif mode == 'faces':
+            if inlets is None or outlets is None:
+                raise Exception('inlets and outlets must be given in faces ' +
+                                'mode')
+            return self._run_faces(graph, inlets=inlets, outlets=outlets)
+        elif mode == 'sampled':
+            return self._run_sampled(graph, n_samples=n_samples,
+                                     chunk_size=chunk_size, seed=seed)
+        else:
+            raise Exception('Unrecognized mode: ' + str(mode))
+
+    def _build_graph(self, phase=None):
         conduit_lengths = sp.sum(misc.conduit_lengths(network=self._net,
                                  mode='centroid'), axis=1)
         graph = self._net.create_adjacency_matrix(data=conduit_lengths,
@@ -60,6 +167,10 @@ class Tortuosity(GenericAlgorithm):
                 graph = self._net.create_adjacency_matrix(data=temp,
                                                           sprsfmt='csr',
                                                           prop='temp')
+        return graph
+
+    def _run_all(self, graph):
+        logger.warning('This algorithm can take some time...')
         path = spgr.shortest_path(csgraph=graph, method='D', directed=False)
 
         Px = sp.array(self._net['pore.coords'][:, 0], ndmin=2)
@@ -77,3 +188,56 @@ class Tortuosity(GenericAlgorithm):
         temp[sp.isinf(temp)] = 0
 
         return temp
+
+    def _run_faces(self, graph, inlets, outlets):
+        if type(inlets) == str:
+            inlets = self._net.pores(inlets)
+        if type(outlets) == str:
+            outlets = self._net.pores(outlets)
+        inlets = self._parse_locations(inlets)
+        outlets = self._parse_locations(outlets)
+        Np = self._net.Np
+        # Connect all inlets to an extra 'super' source pore with zero length
+        # connections, so one search finds the nearest inlet for every pore
+        graph = misc._join_super_pore(graph, inlets)
+        path, pred = spgr.dijkstra(csgraph=graph, directed=False,
+                                   indices=Np, return_predecessors=True)
+        # Walk the predecessors back to the inlet from which each path starts
+        origin = sp.copy(outlets)
+        reached = pred[outlets] >= 0
+        active = reached & (pred[origin] != Np)
+        while sp.any(active):
+            origin[active] = pred[origin[active]]
+            active[active] = pred[origin[active]] != Np
+        coords = self._net['pore.coords']
+        Ds = sp.sqrt(sp.sum(sp.square(coords[outlets] - coords[origin]),
+                            axis=1))
+        tau = sp.ones((sp.size(outlets),)) * sp.nan
+        mask = reached & (Ds > 0)
+        tau[mask] = path[outlets][mask] / Ds[mask]
+        return tau
+
+    def _run_sampled(self, graph, n_samples, chunk_size, seed=None):
+        rng = sp.random.RandomState(seed)
+        Np = self._net.Np
+        n_samples = min(int(n_samples), Np)
+        chunk_size = max(1, int(chunk_size))
+        sources = rng.choice(Np, size=n_samples, replace=False)
+        coords = self._net['pore.coords']
+        moments = (0, 0.0, 0.0)
+        for i in range(0, n_samples, chunk_size):
+            block = sources[i:i + chunk_size]
+            path = spgr.dijkstra(csgraph=graph, directed=False, indices=block)
+            Ds = sp.zeros_like(path)
+            for ax in range(3):
+                Ds += sp.square(coords[block, ax][:, None] -
+                                coords[:, ax][None, :])
+            Ds = sp.sqrt(Ds)
+            mask = sp.isfinite(path) & (Ds > 0)
+            tau = path[mask] / Ds[mask]
+            # Merge the mean and squared deviations of each chunk
+            moments = misc._merge_moments(moments, misc._moments(tau))
+        count, mean, m2 = moments
+        if count == 0:
+            return {'mean': sp.nan, 'std': sp.nan, 'count': 0}
+        return {'mean': mean, 'std': sp.sqrt(m2 / count), 'count': count}
@@ -40,6 +40,16 @@ class Core(dict):
         logger.debug('Initializing Core class')
         self.name = name
 
+    def __setattr__(self, name, value):
+        if (name == 'models') and isinstance(value, ModelsDict):
+            value._set_master(self)
+        super().__setattr__(name, value)
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if isinstance(self.__dict__.get('models'), ModelsDict):
+            self.models._set_master(self)
+
     def __repr__(self):
         return '<%s.%s object at %s>' % (
             self.__class__.__module__,
@@ -77,6 +87,7 @@ class Core(dict):
         # Skip checks for 'coords', 'conns'
         if key in ['pore.coords', 'throat.conns']:
             super(Core, self).__setitem__(key, value)
+            self._update_keyindex(key)
             return
         # Skip checks for protected props, and prevent changes if defined
         protected_keys = ['all']
@@ -85,20 +96,24 @@ class Core(dict):
                 if sp.shape(self[key]) == (0,):
                     logger.debug(key+' is being defined.')
                     super(Core, self).__setitem__(key, value)
+                    self._update_keyindex(key)
                 else:
                     logger.warning(key+' is already defined.')
             else:
                 logger.debug(key+' is being defined.')
                 super(Core, self).__setitem__(key, value)
+                self._update_keyindex(key)
             return
         # Write value to dictionary
         if sp.shape(value)[0] == 1:  # If value is scalar
             logger.debug('Broadcasting scalar value into vector: '+key)
             value = sp.ones((self._count(element), ), dtype=value.dtype)*value
             super(Core, self).__setitem__(key, value)
+            self._update_keyindex(key)
         elif sp.shape(value)[0] == self._count(element):
             logger.debug('Updating vector: '+key)
             super(Core, self).__setitem__(key, value)
+            self._update_keyindex(key)
         else:
             if self._count(element) == 0:
                 self.update({key: value})
@@ -108,6 +123,75 @@ class Core(dict):
                 # TODO: This should probably raise the following exception
                 # raise Exception('Cannot write vector of the wrong length')
 
+    def __delitem__(self, key):
+        super(Core, self).__delitem__(key)
+        self._update_keyindex(key)
+
+    def pop(self, key, *args):
+        value = super(Core, self).pop(key, *args)
+        self._update_keyindex(key)
+        return value
+
+    def update(self, *args, **kwargs):
+        temp = dict(*args, **kwargs)
+        super(Core, self).update(temp)
+        for key in temp.keys():
+            self._update_keyindex(key)
+
+    def _get_keyindex(self):
+        r"""
+        Returns the index of the keys on the object, split into 'labels'
+        (boolean arrays) and 'props' (all others).  Each is a dict of
+        {key: element} in the same order as the object's own keys, so label
+        and property queries don't need to inspect every array.
+
+        The index is kept up to date by ``__setitem__``, ``__delitem__``,
+        ``pop``, ``update`` and ``clear``, and is rebuilt if its size no
+        longer matches the object.
+        """
+        try:
+            index = self._keyindex
+            if len(index['labels']) + len(index['props']) != len(self):
+                raise Exception('The key index is out of date')
+        except:
+            index = {'labels': {}, 'props': {}}
+            for key, value in dict.items(self):
+                kind = self._key_kind(value)
+                index[kind][key] = key.split('.')[0]
+            self._keyindex = index
+        return index
+
+    def _update_keyindex(self, key):
+        r"""
+        Updates the entry of ``key`` in the key index after it has been
+        written or removed.
+        """
+        try:
+            index = self._keyindex
+        except AttributeError:  # The index will be built when first needed
+            return
+        if key not in self.keys():
+            index['labels'].pop(key, None)
+            index['props'].pop(key, None)
+            return
+        kind = self._key_kind(dict.__getitem__(self, key))
+        other = {'labels': 'props', 'props': 'labels'}[kind]
+        if key in index[kind]:
+            return
+        if key in index[other]:
+            # Changing type must keep the key in its original position
+            del index[other][key]
+            index[kind] = {k: k.split('.')[0] for k in self.keys()
+                           if (k in index[kind]) or (k == key)}
+        else:
+            index[kind][key] = key.split('.')[0]
+
+    @staticmethod
+    def _key_kind(value):
+        if getattr(value, 'dtype', None) == bool:
+            return 'labels'
+        return 'props'
+
     def _get_mgr(self):
         if self in mgr.values():
             return mgr
@@ -202,6 +286,7 @@ class Core(dict):
                                    throats=self.Tnet,
                                    mode='remove')
             super().clear()
+            self._keyindex = {'labels': {}, 'props': {}}
             self.models.clear()
             self.update({'throat.all': sp.array([], ndmin=1, dtype=bool)})
             self.update({'pore.all': sp.array([], ndmin=1, dtype=bool)})
@@ -322,7 +407,7 @@ class Core(dict):
         mode = self._parse_mode(mode=mode, allowed=allowed)
         element = self._parse_element(element=element)
         # Prepare lists of each type of array
-        props = [item for item in self.keys() if self[item].dtype != bool]
+        props = list(self._get_keyindex()['props'].keys())
         models = list(self.models.keys())
         constants = [item for item in props if item not in models]
         # Execute desired array lookup
@@ -331,7 +416,8 @@ class Core(dict):
             logger.warning('The \'deep\' mode only works when called from a ' +
                            'Network or Phase object')
         if 'all' in mode:
-            temp = [item for item in props if item.split('.')[0] in element]
+            index = self._get_keyindex()['props']
+            temp = [item for item in props if index[item] in element]
             vals.extend(temp)
             return vals
         if 'models' in mode:
@@ -355,40 +441,54 @@ class Core(dict):
         mode = self._parse_mode(mode=mode, allowed=allowed, single=True)
         element = self._parse_element(element=element)
         # Collect list of all pore OR throat labels
-        a = set([k for k in self.keys() if k.split('.')[0] == element[0]])
-        b = set([k for k in self.keys() if self[k].dtype == bool])
-        labels = list(a.intersection(b))
+        index = self._get_keyindex()['labels']
+        labels = [k for k in index.keys() if index[k] == element[0]]
         labels.sort()
         labels = sp.array(labels)  # Convert to ND-array for following checks
+        # Build the N x Li mask from the requested locations of each label
         arr = sp.zeros((sp.shape(locations)[0], len(labels)), dtype=bool)
-        col = 0
-        for item in labels:
-            arr[:, col] = self[item][locations]
-            col = col + 1
+        if len(labels) > 0:
+            arr[:] = sp.column_stack([self[item][locations]
+                                      for item in labels])
         if mode in ['count']:
             return sp.sum(arr, axis=1)
         if mode in ['union']:
-            temp = labels[sp.sum(arr, axis=0) > 0]
-            temp.tolist()
+            temp = labels[sp.any(arr, axis=0)]
             return Tools.PrintableList(temp)
         if mode in ['intersection']:
-            temp = labels[sp.sum(arr, axis=0) == sp.shape(locations, )[0]]
-            temp.tolist()
+            temp = labels[sp.all(arr, axis=0)]
             return Tools.PrintableList(temp)
         if mode in ['not', 'difference']:
-            temp = labels[sp.sum(arr, axis=0) != sp.shape(locations, )[0]]
-            temp.tolist()
+            temp = labels[~sp.all(arr, axis=0)]
             return Tools.PrintableList(temp)
         if mode in ['mask']:
             return arr
         if mode in ['none']:
+            # Most locations share a few label combinations, so find the
+            # distinct rows of the bit-packed mask and list each one once
+            words = self._pack_label_mask(arr)
+            rows, inv = sp.unique(words, return_index=True,
+                                  return_inverse=True, axis=0)[1:]
+            combos = [list(labels[arr[i, :]]) for i in rows]
             temp = sp.ndarray((sp.shape(locations, )[0], ), dtype=object)
-            for i in sp.arange(0, sp.shape(locations, )[0]):
-                temp[i] = list(labels[arr[i, :]])
+            temp[:] = [combos[i][:] for i in inv.tolist()]
             return temp
         else:
             logger.error('unrecognized mode:'+str(mode))
 
+    @staticmethod
+    def _pack_label_mask(mask):
+        r"""
+        Pack the rows of an N x Li boolean label mask into an N x ceil(Li/64)
+        array of uint64 words, with one bit per label
+        """
+        N, L = sp.shape(mask)
+        Nwords = max(1, -(-L // 64))
+        temp = sp.zeros((N, Nwords*64), dtype=bool)
+        temp[:, :L] = mask
+        words = sp.packbits(temp, axis=1)
+        return sp.ascontiguousarray(words).view(sp.uint64)
+
     def labels(self, pores=[], throats=[], element=None, mode='union'):
         r"""
         Returns the labels applied to specified pore or throat locations
@@ -442,12 +542,9 @@ class Core(dict):
         # Short-circuit query when no pores or throats are given
         if (sp.size(pores) == 0) and (sp.size(throats) == 0):
             element = self._parse_element(element=element)
+            index = self._get_keyindex()['labels']
             for item in element:
-                a = set([key for key in self.keys()
-                         if key.split('.')[0] == item])
-                b = set([key for key in self.keys()
-                         if self[key].dtype == bool])
-                labels.extend(list(a.intersection(b)))
+                labels.extend([k for k in index.keys() if index[k] == item])
         elif (sp.size(pores) > 0) and (sp.size(throats) > 0):
             raise Exception('Cannot perform label query on pores and ' +
                             'throats simultaneously')
@@ -753,7 +850,7 @@ class Core(dict):
         indices = self._parse_locations(mask)
         return indices
 
-    def interpolate_data(self, data, operator='mean'):
+    def interpolate_data(self, data, operator='mean', weights=None):
         r"""
         Determines a pore (or throat) property as the average of it's
         neighboring throats (or pores)
@@ -765,60 +862,96 @@ class Core(dict):
             Np or Nt long
 
         operator : string
-            options are mean, min or max, and will determine which function to
-            apply when interpolating data from neighbors, default is mean.
+            options are mean, min, max or sum, and will determine which
+            function to apply when interpolating data from neighbors, default
+            is mean.
+
+        weights : array_like, optional
+            Weights of the values in ``data`` (e.g. throat areas), which must
+            be the same length as ``data``.  These are only used when
+            ``operator`` is 'mean' or 'sum'.
+
         Returns
         -------
         An array containing interpolated pore (or throat) data
 
         Notes
         -----
-        - This uses an unweighted average, without attempting to account for
-        distances or sizes of pores and throats.
+        - Unless ``weights`` are given this uses an unweighted average,
+        without attempting to account for distances or sizes of pores and
+        throats.
         - Only one of pores, throats OR data are accepted
+        - Pores with no neighboring throats on this object receive NaN.
+        - The values for all pores (or throats) are found in one vectorized
+        reduction over the pore-throat pairs of the incidence matrix.
 
         """
         mro = [module.__name__ for module in self.__class__.__mro__]
-        functions = {'min': np.min,
-                     'max': np.max,
-                     'mean': np.mean}
-        if operator not in functions.keys():
+        if operator not in ['min', 'max', 'mean', 'sum']:
             operator = 'mean'
-        func = functions[operator]
         if 'GenericNetwork' in mro:
             net = self
             Ts = net.throats()
             Ps = net.pores()
-            label = 'all'
         elif ('GenericPhase' in mro) or ('GenericAlgorithm' in mro):
             net = self._net
             Ts = net.throats()
             Ps = net.pores()
-            label = 'all'
         elif ('GenericGeometry' in mro) or ('GenericPhysics' in mro):
             net = self._net
             Ts = net.throats(self.name)
             Ps = net.pores(self.name)
-            label = self.name
+        data = sp.array(data, dtype=float, ndmin=1)
+        if weights is None:
+            weights = sp.ones_like(data)
+        else:
+            weights = sp.array(weights, dtype=float, ndmin=1)
+            if sp.shape(weights) != sp.shape(data):
+                raise Exception('weights must be the same length as data')
         if sp.shape(data)[0] == self.Nt:
-            # Upcast data to full network size
-            temp = sp.ones((net.Nt,))*sp.nan
-            temp[Ts] = data
-            data = temp
-            temp = sp.ones((net.Np,))*sp.nan
-            for pore in Ps:
-                neighborTs = net.find_neighbor_throats(pore)
-                neighborTs = net.filter_by_label(throats=neighborTs,
-                                                 labels=label)
-                temp[pore] = func(data[neighborTs])
+            # Each throat contributes its value to both of its pores
+            conns = net['throat.conns'][Ts]
+            pairs = sp.reshape(conns, (-1, ))
+            data = sp.repeat(data, 2)
+            weights = sp.repeat(weights, 2)
+            if operator in ['mean', 'sum']:
+                temp = sp.bincount(pairs, weights=data*weights,
+                                   minlength=net.Np)
+                if operator == 'mean':
+                    with np.errstate(divide='ignore', invalid='ignore'):
+                        temp = temp/sp.bincount(pairs, weights=weights,
+                                                minlength=net.Np)
+            else:
+                # Group the pairs by pore and reduce each group in one call
+                order = sp.argsort(pairs, kind='mergesort')
+                pairs = pairs[order]
+                starts = sp.where(sp.r_[True, pairs[1:] != pairs[:-1]])[0]
+                func = {'min': sp.minimum, 'max': sp.maximum}[operator]
+                temp = sp.ones((net.Np, ))*sp.nan
+                if sp.size(pairs) > 0:
+                    temp[pairs[starts]] = func.reduceat(data[order], starts)
+            # Pores with no neighboring throats are undefined
+            counts = sp.bincount(pairs, minlength=net.Np)
+            temp[counts == 0] = sp.nan
             values = temp[Ps]
         elif sp.shape(data)[0] == self.Np:
             # Upcast data to full network size
             temp = sp.ones((net.Np, ))*sp.nan
             temp[Ps] = data
             data = temp
-            Ps12 = net.find_connected_pores(throats=Ts, flatten=False)
-            values = func(data[Ps12], axis=1)
+            temp = sp.zeros((net.Np, ))
+            temp[Ps] = weights
+            weights = temp
+            Ps12 = net['throat.conns'][Ts]
+            if operator == 'min':
+                values = sp.amin(data[Ps12], axis=1)
+            elif operator == 'max':
+                values = sp.amax(data[Ps12], axis=1)
+            else:
+                values = sp.sum(data[Ps12]*weights[Ps12], axis=1)
+                if operator == 'mean':
+                    with np.errstate(divide='ignore', invalid='ignore'):
+                        values = values/sp.sum(weights[Ps12], axis=1)
         else:
             logger.error('Received data was an ambiguous length')
             raise Exception()
@@ -899,7 +1032,7 @@ class Core(dict):
 
         # Attempt to fetch the requested prop array from each object
         arrs = [item.get(prop) for item in sources]
-        locs = [item._net._get_indices(element, item.name) for item in sources]
+        locs = self._get_interleave_plan(element, sources)
         sizes = [sp.size(a) for a in arrs]
         if all([item is None for item in arrs]):  # prop not found anywhere
             raise KeyError(prop)
@@ -923,13 +1056,9 @@ class Core(dict):
             dummy_val = {'numeric': sp.nan, 'boolean': False, 'other': None}
 
         # Create an empty array of the right type and shape
-        for item in arrs:
-            if item is not None:
-                if len(item.shape) == 1:
-                    temp_arr = sp.zeros((N, ), dtype=item.dtype)
-                else:
-                    temp_arr = sp.zeros((N, item.shape[1]), dtype=item.dtype)
-                temp_arr.fill(dummy_val[atype[0]])
+        item = [a for a in arrs if a is not None][-1]
+        temp_arr = sp.empty((N, ) + item.shape[1:], dtype=item.dtype)
+        temp_arr.fill(dummy_val[atype[0]])
 
         # Convrert int arrays to float IF NaNs are expected
         if (temp_arr.dtype.name.startswith('int') and
@@ -946,6 +1075,29 @@ class Core(dict):
                 temp_arr[inds] = dummy_val[atype[0]]
         return temp_arr
 
+    def _get_interleave_plan(self, element, sources):
+        r"""
+        Returns the Network indices of the pores (or throats) of each source
+        object, as used by ``_interleave_data``.
+
+        These are stored and reused until the locations of any object are
+        changed with ``set_locations`` or the size of the Network changes.
+        """
+        N = self._net._count(element)
+        key = (element, N, tuple([item.name for item in sources]))
+        try:
+            plans = self._interleave_plans
+        except AttributeError:
+            plans = {}
+            self._interleave_plans = plans
+        locs = plans.get(key)
+        if (locs is None) or any([sp.size(inds) != item._count(element)
+                                  for inds, item in zip(locs, sources)]):
+            locs = [item._net._get_indices(element, item.name)
+                    for item in sources]
+            plans[key] = locs
+        return locs
+
     def num_pores(self, labels='all', mode='union'):
         r"""
         Returns the number of pores of the specified labels
@@ -3,7 +3,9 @@
 ModelsDict:  Abstract Class for Containing Models
 ###############################################################################
 """
+import heapq
 import inspect
+import weakref
 from collections import OrderedDict
 from OpenPNM.Base import logging, Workspace
 logger = logging.getLogger()
@@ -53,6 +55,19 @@ class ModelWrapper(dict):
         lines.append(horizontal_rule)
         return '\n'.join(lines)
 
+    def dependencies(self):
+        r"""
+        Returns the names of the properties used by the model, found as the
+        arguments that hold a 'pore.' or 'throat.' property name
+        """
+        deps = []
+        for key, value in self.items():
+            if (key in self.COMPONENTS) or (type(value) is not str):
+                continue
+            if value.split('.')[0] in ['pore', 'throat']:
+                deps.append(value)
+        return deps
+
     def regenerate(self):
         return self.run()
         logger.warning("This method has been depracated, use \'run\' instead.")
@@ -80,7 +95,21 @@ class ModelWrapper(dict):
         kwargs.update(self)
         return self['model'](**kwargs)
 
+    def __getstate__(self):
+        # The reference to the owning ModelsDict is restored when it's used
+        state = self.__dict__.copy()
+        state.pop('_models', None)
+        return state
+
     def _find_master(self):
+        # Go through the ModelsDict holding this model, if it's still there
+        try:
+            models = self._models()
+        except AttributeError:
+            models = None
+        if models is not None:
+            if models.get(self.get('propname')) is self:
+                return models._find_master()
         mgr = Workspace()
         master = []
         for item in list(mgr.keys()):
@@ -144,9 +173,22 @@ class ModelsDict(OrderedDict):
     False
     """
 
+    __slots__ = ['_master']
+
+    def __init__(self, *args, **kwargs):
+        self._master = None
+        super().__init__(*args, **kwargs)
+
+    def __reduce__(self):
+        # The weak reference to the master cannot be pickled or copied, so
+        # only the models are kept and the master is found again when needed
+        state = self.__dict__.copy() or None
+        return (self.__class__, (), state, None, iter(self.items()))
+
     def __setitem__(self, propname, model):
         temp = ModelWrapper(propname=propname, model=None)
         temp.update(**model)
+        temp._models = weakref.ref(self)
         super().__setitem__(propname, temp)
 
     def __str__(self):
@@ -179,6 +221,22 @@ class ModelsDict(OrderedDict):
 
             * 'inclusive': (default) This regenerates all given properties
             * 'exclude': This generates all given properties EXCEPT the given ones
+            * 'downstream': This regenerates the given properties (if they
+              have models) and every model in the simulation that depends on
+              them, directly or indirectly.  Models on the Network,
+              Geometries, Phases and Physics are all included, and are run
+              in dependency order.
+
+        Notes
+        -----
+        The dependencies of each model are inferred from its arguments that
+        hold property names, such as ``throat_diameter='throat.diameter'``.
+        A Geometry depends on properties of the Network and Geometries, while
+        a Phase or Physics also depends on its Phase and the Physics of that
+        Phase.  Properties that a model reads without receiving their names
+        as arguments are not tracked.  In 'downstream' mode, models with a
+        ``regen_mode`` of 'constant' are never run, and 'on_demand' models
+        are only run if given explicitly.
 
         Examples
         --------
@@ -201,6 +259,13 @@ class ModelsDict(OrderedDict):
         """
 
         master = self._find_master()
+        if mode == 'downstream':
+            if type(props) == str:
+                props = [props]
+            for obj, item in self._find_downstream(master, props):
+                obj[item] = obj.models[item].run()
+                logger.info('Regenerated ' + item + ' on ' + obj.name)
+            return
         # If empty, assume all models are to be regenerated
         if props == '':
             props = list(self.keys())
@@ -359,8 +424,118 @@ class ModelsDict(OrderedDict):
         for item in order:
             self.move_to_end(item)
 
+    def _find_downstream(self, master, props):
+        r"""
+        Returns the models that must be rerun after the given properties of
+        the master object have changed, as a list of (object, propname)
+        tuples sorted so that every model comes after the models it uses.
+        """
+        net = master._net
+        sim = [net] + net._geometries + net._phases + net._physics
+
+        # The objects whose properties each object's models can see
+        def scope(obj):
+            temp = [net] + net._geometries
+            if obj._isa('Phase'):
+                temp += [obj] + obj._physics
+            elif obj._isa('Physics'):
+                temp += [obj._phases[0]] + obj._phases[0]._physics
+            return [id(item) for item in temp]
+
+        # Collect all models, in run order, and the models using each prop
+        nodes = []
+        users = {}
+        for obj in sim:
+            seen = scope(obj)
+            for item in obj.models.keys():
+                node = (obj, item)
+                nodes.append(node)
+                for dep in obj.models[item].dependencies():
+                    users.setdefault(dep, []).append((node, seen))
+        rank = {(id(obj), item): i for i, (obj, item) in enumerate(nodes)}
+
+        # Walk from the changed props to all models that use them
+        explicit = [(id(master), item) for item in props]
+        todo = [(master, item) for item in props]
+        found = {}
+        visited = set()
+        parents = {}
+        while todo:
+            obj, item = todo.pop()
+            key = (id(obj), item)
+            if key in visited:
+                continue
+            visited.add(key)
+            if key in rank:
+                mode = obj.models[item]['regen_mode']
+                if (mode == 'constant') or \
+                   (mode == 'on_demand' and key not in explicit):
+                    # The model is not run so its users are only affected if
+                    # the prop itself was given as changed
+                    if key not in explicit:
+                        continue
+                else:
+                    found[key] = (obj, item)
+            for node, seen in users.get(item, []):
+                child = (id(node[0]), node[1])
+                if (id(obj) in seen) and (child != key):
+                    parents.setdefault(child, set()).add(key)
+                    todo.append(node)
+
+        # Sort the models topologically, keeping the run order for ties
+        order = []
+        heap = []
+        count = {}
+        for key in found:
+            count[key] = len([k for k in parents.get(key, []) if k in found])
+            if count[key] == 0:
+                heapq.heappush(heap, (rank[key], key))
+        children = {}
+        for key in found:
+            for k in parents.get(key, []):
+                children.setdefault(k, []).append(key)
+        while heap:
+            key = heapq.heappop(heap)[1]
+            order.append(key)
+            for child in children.get(key, []):
+                if child in count:
+                    count[child] -= 1
+                    if count[child] == 0:
+                        heapq.heappush(heap, (rank[child], child))
+        if len(order) < len(found):
+            logger.warning('Circular model dependencies found, remaining ' +
+                           'models will be run in their normal order')
+            done = set(order)
+            order += sorted([k for k in found if k not in done],
+                            key=lambda k: rank[k])
+        return [found[key] for key in order]
+
+    def _set_master(self, obj):
+        r"""
+        Stores a weak reference to the object that this ModelsDict is being
+        attached to, so the master can be found without searching the
+        Workspace.  If the ModelsDict is still in use by another object the
+        reference is dropped, so that ``_find_master`` reports the conflict.
+        """
+        master = self._get_master()
+        if (master is not None) and (master is not obj) and \
+           (master.models is self):
+            self._master = None
+        else:
+            self._master = weakref.ref(obj)
+
+    def _get_master(self):
+        try:
+            return self._master()
+        except (AttributeError, TypeError):
+            return None
+
     def _find_master(self):
         mgr = Workspace()
+        master = self._get_master()
+        if (master is not None) and (master.models is self) and \
+           (mgr.get(master.name) is master):
+            return master
         master = []
         for item in list(mgr.keys()):
             if mgr[item].models is self:
@@ -371,5 +546,5 @@ class ModelsDict(OrderedDict):
                             'same dictionary multiple times use the copy method.')
         elif len(master) == 0:
             raise Exception('ModelsDict has no master.')
-
+        self._master = weakref.ref(master[0])
         return master[0]
@@ -152,6 +152,7 @@ class SetLocations():
                 net[element+'.'+'blank'][inds_orig] = obj[item]
                 obj[item] = net[element+'.'+'blank'][inds_new]
         net.pop(element+'.'+'blank', None)
+        SetLocations._reset_plans(net)
 
     @staticmethod
     def drop(obj, element, locations):
@@ -175,3 +176,10 @@ class SetLocations():
         if obj._isa('Physics'):
             phase = obj.parent_phase
             phase[element+'.'+obj.name][locations] = False
+        SetLocations._reset_plans(net)
+
+    @staticmethod
+    def _reset_plans(net):
+        # Discard the interleave plans that still refer to the old locations
+        for item in [net] + net._phases:
+            item._interleave_plans = {}
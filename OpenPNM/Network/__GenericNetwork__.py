@@ -5,7 +5,6 @@ GenericNetwork: Abstract class to construct pore networks
 ===============================================================================
 
 """
-import itertools
 import scipy as sp
 import scipy.sparse as sprs
 from scipy.sparse import csgraph
@@ -297,33 +296,51 @@ class GenericNetwork(Core):
 
         Returns
         -------
-        Tnum : list of list of int
-            Returns throat number(s), or empty array if pores are not connected
+        Tnum : array of int
+            The throat number connecting each pair of pores, or -1 if the pores
+            are not connected.  If a pair is connected by duplicate throats the
+            lowest throat number is returned.
 
         Examples
         --------
         >>> import OpenPNM
         >>> pn = OpenPNM.Network.TestNet()
         >>> pn.find_connecting_throat([0, 1, 2], [2, 2, 2])
-        [[], [3], []]
+        array([-1,  3, -1])
 
-        TODO: This now works on 'vector' inputs, but is not actually vectorized
-        in the Numpy sense, so could be slow with large P1,P2 inputs
+        Notes
+        -----
+        Each throat is encoded by its pair of pores as ``P1*Np + P2`` with P1
+        the lower pore number.  The codes are sorted when first needed and
+        stored with the adjacency matrices, so each pair is found with a
+        binary search.
         """
         P1 = self._parse_locations(P1)
         P2 = self._parse_locations(P2)
-        Ts1 = self.find_neighbor_throats(P1, flatten=False)
-        Ts2 = self.find_neighbor_throats(P2, flatten=False)
-        Ts = []
-
-        for row in range(0, len(P1)):
-            if P1[row] == P2[row]:
-                throat = []
-            else:
-                throat = sp.intersect1d(Ts1[row], Ts2[row]).tolist()
-            Ts.insert(0, throat)
-        Ts.reverse()
-        return Ts
+        try:
+            codes, Ts = self._adjacency_matrix['pairs']
+        except:
+            codes, Ts = self._find_throat_pairs()
+            self._adjacency_matrix['pairs'] = (codes, Ts)
+        if sp.size(codes) == 0:
+            return -sp.ones(sp.broadcast(P1, P2).shape, dtype=int)
+        P1 = P1.astype(sp.int64)
+        P2 = P2.astype(sp.int64)
+        query = sp.minimum(P1, P2)*self.num_pores() + sp.maximum(P1, P2)
+        inds = sp.searchsorted(codes, query)
+        inds[inds == sp.size(codes)] = 0
+        found = (codes[inds] == query)*(P1 != P2)
+        return sp.where(found, Ts[inds], -1)
+
+    def _find_throat_pairs(self):
+        r"""
+        Return the sorted ``P1*Np + P2`` codes of the pore pair of each throat,
+        with P1 the lower pore number, and the throat numbers in the same order
+        """
+        conns = self['throat.conns'].astype(sp.int64)
+        codes = sp.amin(conns, axis=1)*self.num_pores() + sp.amax(conns, axis=1)
+        Ts = sp.argsort(codes, kind='mergesort')
+        return codes[Ts], Ts
 
     def find_neighbor_pores(self, pores, mode='union', flatten=True, excl_self=True):
         r"""
@@ -467,43 +484,57 @@ class GenericNetwork(Core):
         if sp.size(pores) == 0:
             return sp.array([], ndmin=1, dtype=int)
 
-        # Test for existence of incidence or adjacency matrix
-        if element == 'pore':
-            try:
-                neighbors = self._adjacency_matrix['lil'].rows[[pores]]
-            except:
-                temp = self.create_adjacency_matrix(sprsfmt='lil')
-                self._adjacency_matrix['lil'] = temp
-                neighbors = self._adjacency_matrix['lil'].rows[[pores]]
-        elif element == 'throat':
-            try:
-                neighbors = self._incidence_matrix['lil'].rows[[pores]]
-            except:
-                temp = self.create_incidence_matrix(sprsfmt='lil')
-                self._incidence_matrix['lil'] = temp
-                neighbors = self._incidence_matrix['lil'].rows[[pores]]
+        # Gather the CSR rows of the requested pores into one flat array
+        indptr, indices = self._get_neighbor_index(element)
+        starts = indptr[pores]
+        counts = indptr[pores + 1] - starts
+        offsets = sp.cumsum(counts) - counts
+        inds = sp.arange(sp.sum(counts)) + sp.repeat(starts - offsets, counts)
+        neighbors = indices[inds].astype(int)
 
         if flatten:
-            # Convert rows of lil into single flat list
-            neighbors = itertools.chain.from_iterable(neighbors)
             if element == 'pore':  # Add input pores to list
-                neighbors = itertools.chain.from_iterable([neighbors, pores])
-            # Convert list to numpy array
-            neighbors = sp.fromiter(neighbors, dtype=int)
+                neighbors = sp.concatenate((neighbors, pores))
+            # Count how many input pores share each neighbor
+            hits = sp.bincount(neighbors)
             if mode == 'not_intersection':
-                neighbors = sp.unique(sp.where(sp.bincount(neighbors) == 1)[0])
+                neighbors = sp.where(hits == 1)[0]
             elif mode == 'union':
-                neighbors = sp.unique(neighbors)
+                neighbors = sp.where(hits > 0)[0]
             elif mode == 'intersection':
-                neighbors = sp.unique(sp.where(sp.bincount(neighbors) > 1)[0])
+                neighbors = sp.where(hits > 1)[0]
             if excl_self and element == 'pore':  # Remove input pores from list
                 neighbors = neighbors[~sp.in1d(neighbors, pores)]
             return sp.array(neighbors, ndmin=1, dtype=int)
         else:
-            # Convert lists in array to numpy arrays
-            neighbors = [sp.array(neighbors[i]) for i in range(0, len(pores))]
+            # Split the flat array back into one array per input pore
+            neighbors = sp.split(neighbors, sp.cumsum(counts)[:-1])
             return sp.array(neighbors, ndmin=1)
 
+    def _get_neighbor_index(self, element):
+        r"""
+        Return the ``indptr`` and ``indices`` arrays of the CSR adjacency
+        (element 'pore') or incidence (element 'throat') matrix, so that the
+        neighbors of pore ``i`` are ``indices[indptr[i]:indptr[i+1]]``
+        """
+        if element == 'pore':
+            try:
+                csr = self._adjacency_matrix['csr']
+                csr.indptr
+            except:
+                csr = self.create_adjacency_matrix(sprsfmt='csr')
+                self._adjacency_matrix['csr'] = csr
+        else:
+            try:
+                csr = self._incidence_matrix['csr']
+                csr.indptr
+            except:
+                csr = self.create_incidence_matrix(sprsfmt='csr')
+                self._incidence_matrix['csr'] = csr
+        if not csr.has_sorted_indices:
+            csr.sort_indices()
+        return csr.indptr, csr.indices
+
     def num_neighbors(self, pores, element='pore', flatten=False,
                       mode='union'):
         r"""
@@ -973,14 +1004,12 @@ class GenericNetwork(Core):
                     health['trim_pores'].extend(temp[c[i]])
 
         # Check for duplicate throats
-        am = self.create_adjacency_matrix(sprsfmt='lil')
+        codes, Ts = self._find_throat_pairs()
+        codes, inds, counts = sp.unique(codes, return_index=True,
+                                        return_counts=True)
         mergeTs = []
-        for i in range(0, self.Np):
-            for j in sp.where(sp.array(am.data[i]) > 1)[0]:
-                k = am.rows[i][j]
-                mergeTs.extend(self.find_connecting_throat(i, k))
-        # Remove duplicates
-        mergeTs = [list(i) for i in set(tuple(i) for i in mergeTs)]
+        for i, n in zip(inds[counts > 1], counts[counts > 1]):
+            mergeTs.append(Ts[i:i+n].tolist())
         health['duplicate_throats'] = mergeTs
 
         # Check for bidirectional throats
@@ -1038,6 +1067,7 @@ class GenericNetwork(Core):
         self._adjacency_matrix['coo'] = {}
         self._adjacency_matrix['csr'] = {}
         self._adjacency_matrix['lil'] = {}
+        self._adjacency_matrix['pairs'] = {}
         self._incidence_matrix['coo'] = {}
         self._incidence_matrix['csr'] = {}
         self._incidence_matrix['lil'] = {}
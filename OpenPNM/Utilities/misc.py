@@ -1,5 +1,6 @@
 import scipy as _sp
 import time as _time
+import multiprocessing as _mp
 import scipy.sparse as _sprs
 import OpenPNM as _op
 from scipy.spatial.distance import cdist as dist
@@ -76,6 +77,207 @@ def find_path(network, pore_pairs, weights=None):
     return dict_
 
 
+def path_length_statistics(network, weights=None, sources=None,
+                           chunk_size=100, bins=50, bin_range=None,
+                           processes=None):
+    r"""
+    Computes the distribution of shortest path lengths between the given
+    source pores and all other pores, without storing the full distance
+    matrix.
+
+    Parameters
+    ----------
+    network : OpenPNM Network Object
+        The Network object on which the search should be performed
+
+    weights : array_like, optional
+        An Nt-long list of throat weights for the search, such as the throat
+        lengths.  If no weights are given the number of throats along each
+        path is used.
+
+    sources : array_like, optional
+        The pores from which paths are sought.  If not given all pores are
+        used, in which case each pair of pores is counted twice.
+
+    chunk_size : int
+        The number of source pores searched at once.  The memory requirement
+        is approximately chunk_size x Np.
+
+    bins : int or array_like
+        The number of bins in the histogram, or the bin edges.
+
+    bin_range : tuple, optional
+        The lower and upper edge of the bins when ``bins`` is an int.  If not
+        given the bins span from 0 to an upper bound of the longest path,
+        found from a single search from one pore in each cluster.  Path
+        lengths outside the bins are counted in the first or last bin, so
+        the histogram 'counts' always add up to 'count'.
+
+    processes : int, optional
+        If given, the chunks are distributed over a pool of this many worker
+        processes.
+
+    Returns
+    -------
+    A dictionary containing the 'count', 'mean', 'std', 'min' and 'max' of
+    the path lengths between each source and every pore it connects to, along
+    with the histogram 'counts' and 'bin_edges'.
+
+    Notes
+    -----
+    Each chunk of sources is searched with Dijkstra's algorithm from the
+    scipy.sparse.csgraph module and immediately reduced to its statistics.
+    Paths of zero length (source to itself) and between unconnected pores are
+    excluded.
+
+    Examples
+    --------
+    >>> import OpenPNM
+    >>> import OpenPNM.Utilities.misc as misc
+    >>> pn = OpenPNM.Network.Cubic(shape=[3, 3, 3])
+    >>> stats = misc.path_length_statistics(network=pn, chunk_size=10)
+    >>> stats['count']
+    702
+    >>> stats['max']
+    6.0
+    """
+    if weights is None:
+        weights = _sp.ones_like(network.Ts)
+    graph = network.create_adjacency_matrix(data=weights,
+                                            sprsfmt='csr',
+                                            dropzeros=False)
+    if sources is None:
+        sources = network.Ps
+    sources = _sp.array(sources, ndmin=1)
+    chunk_size = max(1, int(chunk_size))
+    if _sp.size(bins) == 1:
+        if bin_range is None:
+            bin_range = (0, _path_length_bound(graph))
+        bins = _sp.linspace(bin_range[0], bin_range[1], int(bins) + 1)
+    bins = _sp.array(bins, dtype=float)
+    blocks = [sources[i:i + chunk_size]
+              for i in range(0, _sp.size(sources), chunk_size)]
+    if processes is None or processes <= 1:
+        results = (_path_length_block(block, graph, bins) for block in blocks)
+        stats = _merge_path_stats(results, bins)
+    else:
+        pool = _mp.Pool(processes=processes, initializer=_set_path_graph,
+                        initargs=(graph, bins))
+        try:
+            results = pool.imap_unordered(_path_length_block, blocks)
+            stats = _merge_path_stats(results, bins)
+        finally:
+            pool.close()
+            pool.join()
+    pdict = _op.Base.Tools.PrintableDict
+    return pdict(stats)
+
+
+def _join_super_pore(graph, pores):
+    r"""
+    Returns a copy of the Np-by-Np graph with an extra 'super' pore (index
+    Np) joined to the given pores by zero-length connections, so that a
+    single search from the super pore starts from all of them at once.
+    """
+    N = graph.shape[0]
+    pores = _sp.array(pores, ndmin=1)
+    graph = graph.tocoo()
+    row = _sp.concatenate((graph.row, _sp.ones_like(pores) * N))
+    col = _sp.concatenate((graph.col, pores))
+    data = _sp.concatenate((graph.data, _sp.zeros((_sp.size(pores),))))
+    return _sprs.csr_matrix((data, (row, col)), shape=(N + 1, N + 1))
+
+
+def _moments(values):
+    r"""
+    Returns the count, mean and sum of squared deviations from the mean (M2)
+    of the given values.
+    """
+    n = _sp.size(values)
+    if n == 0:
+        return (0, 0.0, 0.0)
+    mean = _sp.mean(values)
+    return (n, mean, _sp.sum(_sp.square(values - mean)))
+
+
+def _merge_moments(a, b):
+    r"""
+    Combines the (count, mean, M2) tuples of two sets of values into those of
+    their union, without the cancellation of the sum of squares formula.
+    """
+    na, mean_a, m2_a = a
+    nb, mean_b, m2_b = b
+    n = na + nb
+    if n == 0:
+        return (0, 0.0, 0.0)
+    delta = mean_b - mean_a
+    return (n, mean_a + delta * nb / n, m2_a + m2_b + delta**2 * na * nb / n)
+
+
+def _path_length_bound(graph):
+    r"""
+    Returns an upper bound of the longest shortest path in the graph, as twice
+    the largest distance from a representative pore of each cluster.
+    """
+    N = graph.shape[0]
+    labels = _sprs.csgraph.connected_components(graph, directed=False)[1]
+    reps = _sp.unique(labels, return_index=True)[1]
+    graph = _join_super_pore(graph, reps)
+    dist = _sprs.csgraph.dijkstra(csgraph=graph, directed=False, indices=N)
+    bound = 2 * _sp.amax(dist[_sp.isfinite(dist)])
+    return bound if bound > 0 else 1.0
+
+
+def _set_path_graph(graph, bins):
+    r"""
+    Stores the graph and bin edges used by _path_length_block in each worker
+    process.  This is the initializer of the worker pool.
+    """
+    global _path_graph, _path_bins
+    _path_graph = graph
+    _path_bins = bins
+
+
+def _path_length_block(block, graph=None, bins=None):
+    r"""
+    Finds the path lengths from a block of source pores and reduces them to
+    their moments, min, max and histogram counts.  Lengths outside the bins
+    are counted in the first or last bin.  If the graph and bins are not
+    given those stored by _set_path_graph are used.
+    """
+    if graph is None:
+        graph = _path_graph
+        bins = _path_bins
+    dist = _sprs.csgraph.dijkstra(csgraph=graph, directed=False,
+                                  indices=block)
+    dist = dist[_sp.isfinite(dist) & (dist > 0)]
+    counts = _sp.histogram(_sp.clip(dist, bins[0], bins[-1]), bins=bins)[0]
+    if _sp.size(dist) == 0:
+        return (_moments(dist), _sp.inf, -_sp.inf, counts)
+    return (_moments(dist), _sp.amin(dist), _sp.amax(dist), counts)
+
+
+def _merge_path_stats(results, bins):
+    moments = (0, 0.0, 0.0)
+    lo = _sp.inf
+    hi = -_sp.inf
+    counts = _sp.zeros((_sp.size(bins) - 1,), dtype=int)
+    for m, mn, mx, c in results:
+        moments = _merge_moments(moments, m)
+        lo = min(lo, mn)
+        hi = max(hi, mx)
+        counts += c
+    count, mean, m2 = moments
+    stats = {'count': count, 'counts': counts, 'bin_edges': bins}
+    if count > 0:
+        stats.update({'mean': mean, 'min': lo, 'max': hi,
+                      'std': _sp.sqrt(m2 / count)})
+    else:
+        stats.update({'mean': _sp.nan, 'min': _sp.nan, 'max': _sp.nan,
+                      'std': _sp.nan})
+    return stats
+
+
 def iscoplanar(coords):
     r'''
     Determines if given pores are coplanar with each other
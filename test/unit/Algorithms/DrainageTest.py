@@ -224,3 +224,100 @@ class DrainageTest:
         data = self.alg.get_drainage_data()
         assert 'capillary_pressure' in data.keys()
         assert 'invading_phase_saturation' in data.keys()
+
+    def test_invasion_pressures_match_percolation(self):
+        self.alg.setup(invading_phase=self.water, defending_phase=self.air)
+        self.alg.set_inlets(pores=self.net.pores('top'))
+        self.alg.run(npts=5)
+        inv_Pc = self.alg['pore.inv_Pc'].copy()
+        self.alg.run(npts=50)
+        assert sp.all(self.alg['pore.inv_Pc'] == inv_Pc)
+        entry = self.alg['throat.entry_pressure']
+        for inv_val in sp.unique(inv_Pc[inv_Pc < sp.inf]):
+            # Pores connected to the inlets through open throats
+            clusters = self.net.find_clusters2(mask=entry <= inv_val)
+            inlets = clusters[self.alg['pore.inlets']]
+            Ps = sp.in1d(clusters, inlets[inlets >= 0])
+            assert sp.all(Ps == (inv_Pc <= inv_val))
+
+    def test_trapped_pores_are_disconnected_from_outlets(self):
+        self.alg.setup(invading_phase=self.water,
+                       defending_phase=self.air,
+                       trapping=True)
+        self.alg.set_inlets(pores=self.net.pores('top'))
+        self.alg.set_outlets(pores=self.net.pores('bottom'))
+        self.alg.run(npts=20)
+        trapped = self.alg['pore.trapped']
+        assert sp.any(trapped < sp.inf)
+        for inv_val in sp.unique(trapped[trapped < sp.inf]):
+            # Clusters of defending throats at the trapping pressure
+            Tdefended = self.alg['throat.inv_Pc'] > inv_val
+            clusters = self.net.find_clusters2(mask=Tdefended)
+            outlets = self.alg['pore.outlets']*(self.alg['pore.inv_Pc'] >
+                                                inv_val)
+            Ps = trapped == inv_val
+            assert sp.all(clusters[Ps] >= 0)
+            assert not sp.any(sp.in1d(clusters[Ps], clusters[outlets]))
+
+    def test_run_w_residual_throats_at_inlets(self):
+        self.alg.setup(invading_phase=self.water, defending_phase=self.air)
+        Ps = self.net.pores('top')
+        self.alg.set_inlets(pores=Ps)
+        Ts = self.net.find_neighbor_throats(pores=Ps, mode='intersection')
+        self.alg.set_residual(throats=Ts[:3], mode='overwrite')
+        self.alg.run(npts=10)
+        inv_Pc = self.alg['pore.inv_Pc']
+        assert sp.all(inv_Pc > -sp.inf)
+        assert sp.all(self.alg['throat.inv_Pc'] > -sp.inf)
+        # Pores joined by residual throats are invaded at the first pressure
+        Ps = sp.unique(self.net['throat.conns'][Ts[:3]])
+        assert sp.all(inv_Pc[Ps] == sp.amin(self.alg._inv_points))
+
+    def test_run_w_pressures_above_lowest_entry_pressure(self):
+        net = OpenPNM.Network.Cubic(shape=[6, 6, 1])
+        phase = OpenPNM.Phases.GenericPhase(network=net)
+        rng = sp.random.RandomState(0)
+        phase['throat.entry'] = rng.randint(1, 10, net.Nt).astype(float)
+        alg = OpenPNM.Algorithms.Drainage(network=net)
+        alg.setup(invading_phase=phase, defending_phase=phase,
+                  entry_pressure='throat.entry')
+        alg.set_inlets(pores=net.pores('left'))
+        alg.run(inv_pressures=sp.arange(3, 10))
+        assert sp.amin(phase['throat.entry']) < 3
+        assert sp.all(alg['pore.inv_Pc'] >= 3)
+        assert sp.all(alg['throat.inv_Pc'] >= 3)
+
+    def test_run_w_trapping_regression(self):
+        # Pins the results of the single pass trapping on a fixed network
+        net = OpenPNM.Network.Cubic(shape=[6, 6, 1])
+        phase = OpenPNM.Phases.GenericPhase(network=net)
+        rng = sp.random.RandomState(12)
+        phase['throat.entry'] = rng.randint(1, 16, net.Nt).astype(float)
+        alg = OpenPNM.Algorithms.Drainage(network=net)
+        alg.setup(invading_phase=phase, defending_phase=phase,
+                  entry_pressure='throat.entry', trapping=True)
+        alg.set_inlets(pores=net.pores('left'))
+        alg.set_outlets(pores=net.pores('right'))
+        alg.run(inv_pressures=sp.arange(1, 16))
+        inf = sp.inf
+        inv_Pc = [[4, 3, inf, inf, 7, 7],
+                  [3, 3, 3, 4, 7, 7],
+                  [7, 3, 3, 5, 6, 11],
+                  [10, 10, 10, 7, 6, 11],
+                  [1, 1, 6, 9, 11, 11],
+                  [3, 3, 6, 6, 11, 11]]
+        trapped = [[7, 7, 7, 7, 7, inf],
+                   [inf, inf, 7, 7, 7, 11],
+                   [10, inf, 10, 10, 11, 11],
+                   [10, 10, 10, 10, 11, inf],
+                   [10, 10, 10, 11, 11, 11],
+                   [inf, 7, 7, 11, 11, inf]]
+        Ts = {7: [0, 1, 2, 3, 7, 8, 26, 32, 33, 34],
+              10: [12, 15, 16, 17, 20, 21, 42, 44, 45, 48, 49, 50],
+              11: [14, 23, 24, 28, 41, 46, 52, 57, 58]}
+        assert sp.all(alg['pore.inv_Pc'] == sp.ravel(inv_Pc))
+        assert sp.all(alg['pore.trapped'] == sp.ravel(trapped))
+        t_trapped = sp.ones((net.Nt, ))*sp.inf
+        for val in Ts.keys():
+            t_trapped[Ts[val]] = val
+        assert sp.all(alg['throat.trapped'] == t_trapped)
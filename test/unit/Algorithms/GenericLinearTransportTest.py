@@ -1,5 +1,6 @@
 import OpenPNM
 import numpy as np
+import pytest
 import OpenPNM.Physics.models as pm
 
 
@@ -282,3 +283,225 @@ class GenericLinearTransportTest:
                                  mode='remove')
         assert ('pore.source_B' not in self.alg.labels())
         assert ('pore.source_A' not in self.alg.labels())
+
+    def test_build_coefficient_matrix(self):
+        alg = OpenPNM.Algorithms.GenericLinearTransport(network=self.net,
+                                                        phase=self.phase)
+        Dir_pores = self.net.pores('top')
+        alg.set_boundary_conditions(bctype='Dirichlet',
+                                    bcvalue=0.5,
+                                    pores=Dir_pores)
+        alg.set_boundary_conditions(bctype='Neumann_group',
+                                    bcvalue=1e-10,
+                                    pores=self.net.pores('bottom'))
+        alg.setup(conductance='throat.cond',
+                  quantity='pore.mole_fraction',
+                  super_pore_conductance=None)
+        A = alg.A.toarray()
+        assert A.shape == (self.net.Np + 1, self.net.Np + 1)
+        # Dirichlet rows are unit rows
+        assert np.all(A[Dir_pores, Dir_pores] == 1)
+        assert np.all(np.sum(A[Dir_pores], axis=1) == 1)
+        # All other rows, including the super pore, sum to zero
+        others = np.setdiff1d(np.arange(A.shape[0]), Dir_pores)
+        assert np.allclose(np.sum(A[others], axis=1), 0, atol=1e-20)
+        Ts = self.net.find_neighbor_throats(pores=10)
+        assert np.isclose(A[10, 10], -5e-8 * np.size(Ts))
+
+    def test_coefficient_matrix_reused_on_conductance_change(self):
+        alg = OpenPNM.Algorithms.GenericLinearTransport(network=self.net,
+                                                        phase=self.phase)
+        alg.set_boundary_conditions(bctype='Dirichlet',
+                                    bcvalue=0.5,
+                                    pores=self.net.pores('top'))
+        alg.setup(conductance='throat.cond',
+                  quantity='pore.mole_fraction',
+                  super_pore_conductance=None)
+        A1 = alg.A
+        data1 = A1.data.copy()
+        self.phys['throat.cond'] = 1e-7
+        alg.setup(conductance='throat.cond',
+                  quantity='pore.mole_fraction',
+                  super_pore_conductance=None)
+        assert alg.A is A1
+        assert np.allclose(alg.A.data[data1 != 1], 2*data1[data1 != 1])
+        # Changing the boundary conditions rebuilds the structure
+        alg.set_boundary_conditions(bctype='Dirichlet',
+                                    bcvalue=0.5,
+                                    pores=self.net.pores('bottom'))
+        alg.setup(conductance='throat.cond',
+                  quantity='pore.mole_fraction',
+                  super_pore_conductance=None)
+        assert alg.A is not A1
+        self.phys['throat.cond'] = 5e-8
+
+    def test_iterative_solvers_and_preconditioners(self):
+        alg = OpenPNM.Algorithms.GenericLinearTransport(network=self.net,
+                                                        phase=self.phase)
+        alg.set_boundary_conditions(bctype='Dirichlet',
+                                    bcvalue=0.6,
+                                    pores=self.net.pores('top'))
+        alg.set_boundary_conditions(bctype='Dirichlet',
+                                    bcvalue=0.2,
+                                    pores=self.net.pores('bottom'))
+        alg.run(conductance='throat.cond', quantity='pore.mole_fraction',
+                super_pore_conductance=None)
+        X_direct = alg['pore.mole_fraction']
+        assert alg.solver_report['solver'] == 'spsolve'
+        for solver, precond in [('bicgstab', 'ilu'), ('gmres', 'jacobi'),
+                                ('cg', None)]:
+            alg.set_solver(solver=solver, preconditioner=precond, tol=1e-12)
+            alg.run(conductance='throat.cond', quantity='pore.mole_fraction',
+                    super_pore_conductance=None)
+            assert alg.solver_report['info'] == 0
+            assert alg.solver_report['iterations'] > 0
+            assert alg.solver_report['residual'] < 1e-10
+            assert np.allclose(alg['pore.mole_fraction'], X_direct)
+        with pytest.raises(Exception):
+            alg.set_solver(solver='blah')
+
+    def test_symmetric_solvers_with_dirichlet_pores(self):
+        alg = OpenPNM.Algorithms.GenericLinearTransport(network=self.net,
+                                                        phase=self.phase)
+        alg.set_boundary_conditions(bctype='Dirichlet',
+                                    bcvalue=0.6,
+                                    pores=self.net.pores('top'))
+        alg.set_boundary_conditions(bctype='Dirichlet',
+                                    bcvalue=0.2,
+                                    pores=self.net.pores('bottom'))
+        alg.run(conductance='throat.cond', quantity='pore.mole_fraction',
+                super_pore_conductance=None)
+        X_direct = alg['pore.mole_fraction']
+        for solver in ['cg', 'minres']:
+            alg.set_solver(solver=solver)
+            alg.run(conductance='throat.cond', quantity='pore.mole_fraction',
+                    super_pore_conductance=None)
+            assert alg.solver_report['info'] == 0
+            assert alg.solver_report['residual'] < 1e-12
+            assert np.allclose(alg['pore.mole_fraction'], X_direct)
+
+    def test_cached_factorization(self):
+        alg = OpenPNM.Algorithms.GenericLinearTransport(network=self.net,
+                                                        phase=self.phase)
+        alg.set_solver(solver='spsolve', cache_factorization=True)
+        alg.set_boundary_conditions(bctype='Dirichlet',
+                                    bcvalue=0.6,
+                                    pores=self.net.pores('top'))
+        alg.set_boundary_conditions(bctype='Dirichlet',
+                                    bcvalue=0.2,
+                                    pores=self.net.pores('bottom'))
+        alg.run(conductance='throat.cond', quantity='pore.mole_fraction',
+                super_pore_conductance=None)
+        lu = alg._factorization[1]
+        X1 = alg['pore.mole_fraction']
+        alg.set_boundary_conditions(bctype='Dirichlet',
+                                    pores=self.net.pores('bottom'),
+                                    mode='remove')
+        alg.set_boundary_conditions(bctype='Dirichlet',
+                                    bcvalue=0.4,
+                                    pores=self.net.pores('bottom'))
+        alg.run(conductance='throat.cond', quantity='pore.mole_fraction',
+                super_pore_conductance=None)
+        assert alg._factorization[1] is lu
+        X2 = alg['pore.mole_fraction']
+        assert np.allclose(X2, 0.4 + (X1 - 0.2)/2)
+        X = alg.solve_batch(np.hstack((alg.b, 2*alg.b, 3*alg.b)))
+        assert X.shape == (self.net.Np, 3)
+        assert np.allclose(X[:, 2], 3*X2)
+        assert alg._factorization[1] is lu
+        # Other sparse formats are converted before the fingerprint
+        X = alg.solve_batch(alg.b, A=alg.A.tocoo())
+        assert np.allclose(X[:, 0], X2)
+        assert alg._factorization[1] is lu
+        self.phys['throat.cond'] = 1e-7
+        alg.run(conductance='throat.cond', quantity='pore.mole_fraction',
+                super_pore_conductance=None)
+        assert alg._factorization[1] is not lu
+        self.phys['throat.cond'] = 5e-8
+        assert '_factorization' not in alg.__getstate__()
+
+    def test_rate_modes(self):
+        alg = OpenPNM.Algorithms.GenericLinearTransport(network=self.net,
+                                                        phase=self.phase)
+        alg.set_boundary_conditions(bctype='Dirichlet',
+                                    bcvalue=0.6,
+                                    pores=self.net.pores('top'))
+        alg.set_boundary_conditions(bctype='Dirichlet',
+                                    bcvalue=0.2,
+                                    pores=self.net.pores('bottom'))
+        alg.run(conductance='throat.cond', quantity='pore.mole_fraction',
+                super_pore_conductance=None)
+        Ps = self.net.pores('top')
+        R_single = alg.rate(pores=Ps, mode='single')
+        assert np.shape(R_single) == np.shape(Ps)
+        R_group = alg.rate(pores=Ps, mode='group')
+        assert np.isclose(np.sum(R_single), R_group[0])
+        assert np.isclose(alg.rate(pores=self.net.pores('bottom'))[0],
+                          -R_group[0])
+        # Internal pores have no net rate
+        Ps = self.net.pores(['top', 'bottom'], mode='not')
+        assert np.allclose(alg.rate(pores=Ps, mode='single'), 0, atol=1e-20)
+        Q = alg.rate(mode='throats')
+        assert np.shape(Q) == (self.net.Nt, )
+        X = alg['pore.mole_fraction']
+        conns = self.net['throat.conns']
+        assert np.allclose(Q, 5e-8*(X[conns[:, 0]] - X[conns[:, 1]]))
+
+    def test_nonlinear_solvers(self):
+        self.phys['pore.item4'] = -5e-9
+        self.phys['pore.item5'] = 2.5
+        self.phys['pore.item6'] = 0.0
+        self.phys.models.add(propname='pore.C',
+                             model=pm.generic_source_term.power_law,
+                             A1='pore.item4',
+                             A2='pore.item5',
+                             A3='pore.item6',
+                             x='mole_fraction',
+                             return_rate=False,
+                             regen_mode='on_demand')
+        Ps = self.net.pores('top', mode='not')
+        results = []
+        for kw in [{'nonlinear_solver': 'picard'},
+                   {'nonlinear_solver': 'picard', 'anderson_depth': 3},
+                   {'nonlinear_solver': 'newton', 'line_search': True}]:
+            alg = OpenPNM.Algorithms.GenericLinearTransport(network=self.net,
+                                                            phase=self.phase)
+            alg.set_boundary_conditions(bctype='Dirichlet',
+                                        bcvalue=1.0,
+                                        pores=self.net.pores('top'))
+            alg.set_source_term(source_name='pore.C', pores=Ps, x0=0.5,
+                                tol=1e-10, maxiter=100)
+            alg.setup(conductance='throat.cond',
+                      quantity='pore.mole_fraction',
+                      super_pore_conductance=None)
+            alg.solve(**kw)
+            report = alg.nonlinear_report
+            assert report['iterations'] == alg._steps
+            assert len(report['residual']) == report['iterations'] + 1
+            assert report['residual'][-1] < 1e-15
+            results.append(alg['pore.mole_fraction'])
+        assert np.allclose(results[0], results[1])
+        assert np.allclose(results[0], results[2])
+        # A line search that never reduces the residual takes full steps
+        alg = OpenPNM.Algorithms.GenericLinearTransport(network=self.net,
+                                                        phase=self.phase)
+        alg.set_boundary_conditions(bctype='Dirichlet',
+                                    bcvalue=1.0,
+                                    pores=self.net.pores('top'))
+        alg.set_source_term(source_name='pore.C', pores=Ps, x0=0.5,
+                            tol=1e-10, maxiter=100)
+        alg.setup(conductance='throat.cond',
+                  quantity='pore.mole_fraction',
+                  super_pore_conductance=None)
+        linearize = alg._linearize_source_terms
+        calls = []
+
+        def increasing_residual(guess):
+            calls.append(1)
+            A, b, res = linearize(guess)
+            return A, b, res + len(calls)
+        alg._linearize_source_terms = increasing_residual
+        alg.solve(nonlinear_solver='newton', line_search=True)
+        assert np.allclose(alg['pore.mole_fraction'], results[0])
+        with pytest.raises(Exception):
+            alg.solve(nonlinear_solver='blah')
@@ -1,5 +1,7 @@
 import OpenPNM as op
 import numpy as np
+import pytest
+import os
 
 
 class InvasionPercolationTest:
@@ -74,3 +76,102 @@ class InvasionPercolationTest:
         bulk = self.net.pores('boundary', mode='not')
         assert np.allclose(self.alg['pore.trapped'][bulk],
                            (self.alg['pore.trapped_slow'] != -1)[bulk])
+
+    def test_apply_trapping_clusters_are_connected(self):
+        alg = op.Algorithms.InvasionPercolation(network=self.net)
+        alg.setup(phase=self.phase)
+        alg.set_inlets(pores=self.net.pores('front_boundary'))
+        alg.run()
+        alg.apply_trapping(self.net.pores('back_boundary'))
+        clusters = alg['pore.clusters']
+        assert np.sum(np.unique(clusters) >= 0) > 1
+        for c in np.unique(clusters[clusters >= 0]):
+            labels = self.net.find_clusters2(clusters == c)
+            assert np.size(np.unique(labels[clusters == c])) == 1
+        conns = self.net['throat.conns']
+        Ts = np.any(alg['pore.trapped'][conns], axis=1)
+        assert np.all(alg['throat.trapped'] == Ts)
+
+    def test_run_compiled_and_in_steps(self):
+        inlets = self.net.pores('front_boundary')
+        alg1 = op.Algorithms.InvasionPercolation(network=self.net)
+        alg1.setup(phase=self.phase)
+        alg1.set_inlets(pores=inlets)
+        alg1.run(compiled=False)
+        alg2 = op.Algorithms.InvasionPercolation(network=self.net)
+        alg2.setup(phase=self.phase)
+        alg2.set_inlets(pores=inlets)
+        alg2.run(n_steps=50, compiled=False)
+        alg2.run(compiled=False)
+        for item in ['pore.invasion_sequence', 'throat.invasion_sequence']:
+            assert np.all(alg1[item] == alg2[item])
+        alg3 = op.Algorithms.InvasionPercolation(network=self.net)
+        alg3.setup(phase=self.phase)
+        alg3.set_inlets(pores=inlets)
+        try:
+            import numba
+        except ImportError:
+            with pytest.raises(Exception, match='requires numba'):
+                alg3.run(compiled=True)
+        else:
+            alg3.run(n_steps=50, compiled=True)
+            alg3.run(compiled=True)
+            for item in ['pore.invasion_sequence', 'throat.invasion_sequence']:
+                assert np.all(alg1[item] == alg3[item])
+
+    def _new_alg(self):
+        alg = op.Algorithms.InvasionPercolation(network=self.net)
+        alg.setup(phase=self.phase)
+        alg.set_inlets(pores=self.net.pores('front_boundary'))
+        return alg
+
+    def test_run_stop_conditions(self):
+        ref = self._new_alg()
+        ref.run(compiled=False)
+        for compiled in [False, None]:
+            # Stop at breakthrough
+            alg = self._new_alg()
+            alg.run(outlets='back_boundary', compiled=compiled)
+            p_inv = alg['pore.invasion_sequence']
+            seq = np.amax(p_inv)
+            Ps = self.net.pores('back_boundary')
+            assert np.sum(p_inv[Ps] >= 0) == 1
+            assert np.amin(ref['pore.invasion_sequence'][Ps]) == seq
+            # Stop below a given entry pressure
+            Pc = np.median(alg['throat.entry_pressure'])
+            alg = self._new_alg()
+            alg.run(max_pressure=Pc, compiled=compiled)
+            Ts = alg['throat.invasion_sequence'] >= 0
+            assert np.all(alg['throat.entry_pressure'][Ts] <= Pc)
+            T = alg['throat.sorted'][alg.queue[0]]
+            assert alg['throat.entry_pressure'][T] > Pc
+            # Stop at a given saturation
+            alg = self._new_alg()
+            alg.run(saturation=0.5, compiled=compiled)
+            Ps = alg['pore.invasion_sequence'] >= 0
+            Ts = alg['throat.invasion_sequence'] >= 0
+            vol = np.sum(self.net['pore.volume'][Ps]) + \
+                np.sum(self.net['throat.volume'][Ts])
+            total = np.sum(self.net['pore.volume']) + \
+                np.sum(self.net['throat.volume'])
+            assert vol/total >= 0.5
+            # Continuing the run gives the same result as a full one
+            alg.run(compiled=compiled)
+            for item in ['pore.invasion_sequence',
+                         'throat.invasion_sequence']:
+                assert np.all(alg[item] == ref[item])
+
+    def test_checkpoint_and_resume(self):
+        ref = self._new_alg()
+        ref.run(compiled=False)
+        fname = os.path.join(TEMP_DIR, 'ip_checkpoint')
+        alg = self._new_alg()
+        alg.run(n_steps=60, checkpoint=fname, checkpoint_steps=25,
+                compiled=False)
+        assert os.path.isfile(fname + '.npz')
+        alg = self._new_alg()
+        alg.load_checkpoint(fname)
+        assert alg._tcount == 60
+        alg.run(compiled=False)
+        for item in ['pore.invasion_sequence', 'throat.invasion_sequence']:
+            assert np.all(alg[item] == ref[item])
@@ -1,5 +1,6 @@
 import OpenPNM as op
 import numpy as np
+from OpenPNM.Algorithms.__MixedPercolation__ import _InvasionQueue
 from OpenPNM.Physics import models as pm
 import matplotlib.pyplot as plt
 plt.close('all')
@@ -217,6 +218,63 @@ class MixedPercolationTest:
         IP_1.apply_flow(flowrate=tot)
         assert 'throat.invasion_time' in self.water.props()
 
+    def test_coop_filling_table(self):
+        t = self
+        t.process_physics(model='purcell')
+        inlets = t.net.pores(labels=['bottom_boundary'])
+        IP_1 = op.Algorithms.MixedPercolation(network=t.net)
+        IP_1.setup(phase=t.air, def_phase=t.water, inlets=inlets)
+        IP_1.setup_coop_filling(capillary_model='purcell',
+                                inv_points=t.inv_points,
+                                radius=t.fiber_rad)
+        conns = t.net['throat.conns']
+        rows = np.repeat(t.net.Ts, np.diff(IP_1._coop_indptr))
+        pairs = set(zip(rows, IP_1._coop_throats))
+        assert len(pairs) > 0
+        assert all((t2, t1) in pairs for t1, t2 in pairs)
+        # The stored pore is common to both throats of each pair
+        assert np.all(np.any(conns[rows].T == IP_1._coop_pores, axis=0))
+        assert np.all(np.any(conns[IP_1._coop_throats].T ==
+                             IP_1._coop_pores, axis=0))
+        assert np.all(np.in1d(IP_1._coop_Pc, t.inv_points))
+        wrk.purge_object(IP_1)
+
+    def test_run_global(self):
+        t = self
+        t.process_physics(model='purcell', snap_off=False)
+        inlets = t.net.pores(labels=['bottom_boundary'])
+        data = []
+        for kw in [{'inlets': inlets},
+                   {'clusters': [inlets[::2], inlets[1::2]]}]:
+            IP_1 = op.Algorithms.MixedPercolation(network=t.net)
+            IP_1.setup(phase=t.water, def_phase=t.air, **kw)
+            IP_1.run(mode='global')
+            data.append((IP_1['pore.inv_seq'].copy(),
+                         IP_1['pore.cluster'].copy()))
+            wrk.purge_object(IP_1)
+        # Splitting the inlets into clusters gives the same invasion order
+        assert np.array_equal(data[0][0], data[1][0])
+        # and the clusters merge into the lowest numbered one
+        invaded = data[1][0] > -1
+        assert np.all(data[1][1][invaded] == 0)
+
+    def test_invasion_queue(self):
+        queue = _InvasionQueue(min_size=2)
+        queue.push_many([0.5, 0.2, 0.5], [4, 3, 1], 'throat', 0)
+        queue.push(0.5, 4, 'pore', 1)
+        queue.push(0.2, 3, 'throat', 2)
+        assert queue.needs_compaction()
+        pore_stale = np.zeros(10, dtype=bool)
+        throat_stale = np.zeros(10, dtype=bool)
+        throat_stale[1] = True
+        queue.compact(pore_stale, throat_stale)
+        assert len(queue) == 4
+        entries = [queue.pop() for i in range(len(queue))]
+        assert entries == [(0.2, 3, 'throat', 0),
+                           (0.2, 3, 'throat', 2),
+                           (0.5, 4, 'pore', 1),
+                           (0.5, 4, 'throat', 0)]
+
 if __name__ == '__main__':
     wrk.loglevel = 20
     t = MixedPercolationTest()
@@ -229,3 +287,6 @@ if __name__ == '__main__':
     t.test_sinusoidal()
     t.test_sinusoidal_coop()
     t.test_apply_flow_rate()
+    t.test_coop_filling_table()
+    t.test_run_global()
+    t.test_invasion_queue()
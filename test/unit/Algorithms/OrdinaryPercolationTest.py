@@ -33,3 +33,56 @@ class OrdinaryPercolationTest:
         self.OP2.return_results(Pc=7000)
         lpf = self.OP2.evaluate_late_pore_filling(Pc=8000)
         assert sp.size(lpf) == self.net.Np
+
+    def test_incremental_matches_full_labelling(self):
+        Ps = self.net.pores(labels=['bottom'])
+        self.phase['pore.capillary_pressure'] = sp.rand(self.net.Np)*1e4
+        points = sp.linspace(0, 1e4, 20)
+        for ptype in ['bond', 'site']:
+            for AL in [True, False]:
+                OP = op.Algorithms.OrdinaryPercolation(network=self.net,
+                                                       invading_phase=self.phase,
+                                                       percolation_type=ptype)
+                OP.run(inlets=Ps, access_limited=AL, inv_points=points)
+                ref = op.Algorithms.OrdinaryPercolation(network=self.net,
+                                                        invading_phase=self.phase,
+                                                        percolation_type=ptype)
+                ref.set_inlets(Ps)
+                ref._AL = AL
+                for inv_val in points:
+                    ref._do_one_inner_iteration(inv_val)
+                assert sp.all(OP['pore.inv_Pc'] == ref['pore.inv_Pc'])
+                assert sp.all(OP['throat.inv_Pc'] == ref['throat.inv_Pc'])
+                assert sp.allclose(OP['pore.inv_sat'], ref['pore.inv_sat'])
+                assert sp.allclose(OP['throat.inv_sat'], ref['throat.inv_sat'])
+        del self.phase['pore.capillary_pressure']
+
+    def test_trapping_matches_cluster_labelling(self):
+        inlets = self.net.pores(labels=['bottom'])
+        outlets = self.net.pores(labels=['top'])
+        conns = self.net['throat.conns']
+        points = sp.linspace(3000, 10000, 20)
+        for ptype in ['bond', 'site']:
+            OP = op.Algorithms.OrdinaryPercolation(network=self.net,
+                                                   invading_phase=self.phase,
+                                                   percolation_type=ptype)
+            OP.run(inlets=inlets, outlets=outlets, inv_points=points)
+            assert sp.any(OP['pore.trapped'] > 0)
+            ref = op.Algorithms.OrdinaryPercolation(network=self.net,
+                                                    invading_phase=self.phase,
+                                                    percolation_type=ptype)
+            ref.run(inlets=inlets, inv_points=points)
+            p_trapped = sp.zeros([self.net.Np, ])
+            for inv_val in sp.unique(ref['pore.inv_Pc'])[:-1]:
+                Pinvaded = ref['pore.inv_Pc'] <= inv_val
+                Tinvaded = ref['throat.inv_Pc'] <= inv_val
+                Cstate = sp.sum(Pinvaded[conns], axis=1) + Tinvaded
+                clusters = self.net.find_clusters(Cstate == 0)
+                clusters = clusters*(~Pinvaded) - (Pinvaded)
+                trapped = ~sp.in1d(clusters, clusters[outlets])
+                trapped[Pinvaded] = False
+                p_trapped[(p_trapped == 0)*trapped] = inv_val
+            assert sp.all(OP['pore.trapped'] == p_trapped)
+            assert sp.all(OP['pore.inv_Pc'][p_trapped > 0] == sp.inf)
+            assert sp.all(OP['throat.inv_Pc'][OP['throat.trapped'] > 0] ==
+                          sp.inf)
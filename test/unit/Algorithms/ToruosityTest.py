@@ -1,3 +1,53 @@
+import OpenPNM
+import numpy as np
+from OpenPNM.Algorithms.__Tortuosity__ import Tortuosity
+
+
 class ToruosityTest:
+    def setup_class(self):
+        self.net = OpenPNM.Network.Cubic(shape=[6, 5, 4])
+        self.geo = OpenPNM.Geometry.Stick_and_Ball(network=self.net,
+                                                   pores=self.net.Ps,
+                                                   throats=self.net.Ts)
+        self.alg = Tortuosity(network=self.net)
+
     def test_estimate_time(self):
-        pass
+        est_all = self.alg.estimate_time(mode='all')
+        est_faces = self.alg.estimate_time(mode='faces')
+        est_sampled = self.alg.estimate_time(mode='sampled', n_samples=10,
+                                             chunk_size=5)
+        assert est_faces['memory'] < est_sampled['memory'] < est_all['memory']
+        assert est_faces['time'] < est_all['time']
+
+    def test_run_all(self):
+        tau = self.alg.run()
+        assert np.shape(tau) == (self.net.Np, self.net.Np)
+        assert np.all(tau[tau > 0] >= 1 - 1e-10)
+
+    def test_run_faces(self):
+        tau = self.alg.run(mode='faces', inlets='top', outlets='bottom')
+        assert np.shape(tau) == np.shape(self.net.pores('bottom'))
+        assert np.allclose(tau, 1)
+        tau_all = self.alg.run()
+        tau = self.alg.run(mode='faces', inlets=[0], outlets=self.net.Ps)
+        assert np.isnan(tau[0])
+        assert np.allclose(tau[1:], tau_all[0, 1:])
+
+    def test_run_sampled(self):
+        tau_all = self.alg.run()
+        stats = self.alg.run(mode='sampled', n_samples=self.net.Np,
+                             chunk_size=7)
+        assert stats['count'] == np.sum(tau_all > 0)
+        assert np.isclose(stats['mean'], np.mean(tau_all[tau_all > 0]))
+        assert np.isclose(stats['std'], np.std(tau_all[tau_all > 0]))
+        stats = self.alg.run(mode='sampled', n_samples=10, seed=0)
+        assert stats['count'] > 0
+
+    def test_run_sampled_seed(self):
+        np.random.seed(1)
+        state = np.random.get_state()[1].copy()
+        stats1 = self.alg.run(mode='sampled', n_samples=10, seed=3)
+        stats2 = self.alg.run(mode='sampled', n_samples=10, seed=3)
+        assert stats1 == stats2
+        # The global random state is left untouched
+        assert np.all(np.random.get_state()[1] == state)
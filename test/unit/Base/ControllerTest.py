@@ -33,7 +33,8 @@ class WorkspaceTest:
         self.workspace.load_workspace(filename=join(TEMP_DIR, 'test_workspace'))
         flag = [i for i in temp.keys() if i not in self.workspace.keys()]
 
-    def test_save_no_name(self):
+    def test_save_no_name(self, monkeypatch):
+        monkeypatch.chdir(TEMP_DIR)
         self.workspace.save_workspace()
 
     def test_load_v120_pnm(self):
@@ -65,13 +66,15 @@ class WorkspaceTest:
         self.workspace.load_simulation(join(TEMP_DIR, 'test_simulation'))
         assert a.name in self.workspace.keys()
 
-    def test_save_simulation_no_name(self):
+    def test_save_simulation_no_name(self, monkeypatch):
+        monkeypatch.chdir(TEMP_DIR)
         a = OpenPNM.Network.Cubic(shape=[10, 10, 10])
         self.workspace.save_simulation(a)
         self.workspace.clear()
         self.workspace.load_simulation(a.name)
 
-    def test_load_simulation_duplicate_names(self):
+    def test_load_simulation_duplicate_names(self, monkeypatch):
+        monkeypatch.chdir(TEMP_DIR)
         a = OpenPNM.Network.Cubic(shape=[10, 10, 10], name='foo')
         b = OpenPNM.Geometry.GenericGeometry(network=a, pores=a.Ps,
                                              throats=a.Ts, name='bar')
@@ -97,9 +100,10 @@ class WorkspaceTest:
             return a + b
         net = OpenPNM.Network.Cubic(shape=[10, 10, 10])
         net.add_model(propname='pore.blah', model=foo, a=net.Ps, b=10)
-        self.workspace.save_simulation(network=net, filename='blah')
+        fname = join(TEMP_DIR, 'blah')
+        self.workspace.save_simulation(network=net, filename=fname)
         self.workspace.clear()
-        self.workspace.load_simulation('blah')
+        self.workspace.load_simulation(fname)
         net2 = self.workspace[net.name]
         assert 'pore.blah' in net2.keys()
 
@@ -210,10 +210,45 @@ class CoreTest:
         a = self.net.labels(pores=[0, 1], mode='none')
         assert a[0] != a[1]
 
+    def test_labels_pores_mode_none_shared_labels(self):
+        a = self.net.labels(pores=[0, 2, 0], mode='none')
+        b = self.net.labels(pores=[0], mode='intersection')
+        assert a[0] == a[2] == sorted(b)
+        assert a[0] is not a[2]
+        assert sp.all([len(item) for item in a] ==
+                      self.net.labels(pores=[0, 2, 0], mode='count'))
+
+    def test_pack_label_mask(self):
+        mask = sp.zeros((3, 70), dtype=bool)
+        mask[1, 0] = True
+        mask[2, 69] = True
+        words = self.net._pack_label_mask(mask)
+        assert words.shape == (3, 2)
+        assert words.dtype == sp.uint64
+        assert sp.all(words[0] == 0)
+        assert sp.sum(words[1] != 0) == 1
+        assert words[2, 0] == 0 and words[2, 1] != 0
+
     def test_labels_pores_mode_foo(self):
         with pytest.raises(Exception):
             self.net.labels(pores=[0, 1], mode='foo')
 
+    def test_key_index_follows_changes(self):
+        net = OpenPNM.Network.Cubic(shape=[3, 3, 3])
+        net['pore.blah'] = 1.0
+        assert 'pore.blah' in net.props()
+        assert 'pore.blah' not in net.labels()
+        net['pore.blah'] = True
+        assert 'pore.blah' not in net.props()
+        assert 'pore.blah' in net.labels()
+        assert 'pore.blah' in net.labels(pores=[0])
+        del net['pore.blah']
+        assert 'pore.blah' not in net.labels()
+        net.pop('throat.conns')
+        assert 'throat.conns' not in net.props()
+        net.update({'throat.blah': sp.ones(net.Nt)})
+        assert 'throat.blah' in net.props('throat')
+
     def test_labels_hidden_key(self):
         self.net['pore._foo'] = True
         assert 'pore._foo' not in self.net.__str__()
@@ -998,6 +1033,19 @@ class CoreTest:
         geom['pore.blah'] = True
         assert sp.sum(net['pore.blah']) == geom.Np
 
+    def test_interleave_data_after_set_locations(self):
+        net = OpenPNM.Network.Cubic(shape=[2, 2, 2])
+        geom = OpenPNM.Geometry.GenericGeometry(network=net, pores=[0, 1, 2])
+        geom['pore.blah'] = 1.0
+        assert sp.all(~sp.isnan(net['pore.blah'][[0, 1, 2]]))
+        # Swap one pore for another, leaving the number of pores unchanged
+        geom.set_locations(pores=[2], mode='remove')
+        del geom['pore.blah']
+        geom.set_locations(pores=[5], mode='add')
+        geom['pore.blah'] = 1.0
+        assert sp.isnan(net['pore.blah'][2])
+        assert net['pore.blah'][5] == 1.0
+
     def test_interpolate(self):
         net = OpenPNM.Network.Cubic(shape=[3, 1, 1])
         net['pore.blah'] = [1, 2, 3]
@@ -1009,3 +1057,21 @@ class CoreTest:
         assert (1.5 in interp_mean) and (2.5 in interp_mean)
         assert (1 in interp_min) and (3 not in interp_min)
         assert (3 in interp_max) and (1 not in interp_max)
+
+    def test_interpolate_throat_data_weighted(self):
+        net = OpenPNM.Network.Cubic(shape=[3, 1, 1])
+        data = sp.array([1.0, 3.0])
+        interp_sum = net.interpolate_data(data=data, operator='sum')
+        assert sp.all(interp_sum == [1.0, 4.0, 3.0])
+        interp_mean = net.interpolate_data(data=data, weights=[3.0, 1.0])
+        assert sp.all(interp_mean == [1.0, 1.5, 3.0])
+        interp_max = net.interpolate_data(data=data, operator='max')
+        assert sp.all(interp_max == [1.0, 3.0, 3.0])
+
+    def test_interpolate_throat_data_geometry_subset(self):
+        net = OpenPNM.Network.Cubic(shape=[4, 1, 1])
+        geom = OpenPNM.Geometry.GenericGeometry(network=net, pores=[0, 1],
+                                                throats=[1, 2])
+        interp = geom.interpolate_data(data=sp.array([2.0, 4.0]))
+        assert sp.isnan(interp[0])
+        assert interp[1] == 2.0
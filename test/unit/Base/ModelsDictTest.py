@@ -128,3 +128,59 @@ class ModelsDictTest:
             geom.models['pore.seed']['regen_mode'] = 'normal'
             geom.regenerate()
             assert not sp.all(a == geom['pore.seed'])
+
+        def test_regenerate_downstream(self):
+            pn = OpenPNM.Network.Cubic(shape=[5, 5, 5])
+            geom = OpenPNM.Geometry.Stick_and_Ball(network=pn, pores=pn.Ps,
+                                                   throats=pn.Ts)
+            water = OpenPNM.Phases.Water(network=pn)
+            air = OpenPNM.Phases.Air(network=pn)
+            phys_w = OpenPNM.Physics.Standard(network=pn, phase=water,
+                                              geometry=geom)
+            phys_a = OpenPNM.Physics.Standard(network=pn, phase=air,
+                                              geometry=geom)
+            temp = water.models._find_downstream(water, ['pore.temperature'])
+            objs = [item[0] for item in temp]
+            assert water in objs
+            assert phys_w in objs
+            assert geom not in objs
+            assert phys_a not in objs
+            props = [item[1] for item in temp]
+            assert props.index('pore.viscosity') < \
+                props.index('throat.hydraulic_conductance')
+            # The downstream models produce the same values as a full update
+            water['pore.temperature'] = 350.0
+            water.models.regenerate(props='pore.temperature',
+                                    mode='downstream')
+            a = sp.copy(phys_w['throat.hydraulic_conductance'])
+            water.regenerate()
+            phys_w.regenerate()
+            assert sp.allclose(a, phys_w['throat.hydraulic_conductance'])
+
+        def test_regenerate_downstream_skips_constant(self):
+            pn = OpenPNM.Network.Cubic(shape=[5, 5, 5])
+            geom = OpenPNM.Geometry.Stick_and_Ball(network=pn, pores=pn.Ps,
+                                                   throats=pn.Ts)
+            temp = geom.models._find_downstream(geom, ['pore.seed'])
+            props = [item[1] for item in temp]
+            assert 'pore.seed' not in props
+            assert props[0] == 'pore.diameter'
+            assert 'throat.volume' in props
+            assert props.index('throat.length') < props.index('throat.volume')
+
+        def test_find_master_after_copy_and_pickle(self):
+            import pickle
+            pn = OpenPNM.Network.Cubic(shape=[3, 3, 3])
+            geom = OpenPNM.Geometry.GenericGeometry(network=pn, pores=pn.Ps,
+                                                    throats=pn.Ts)
+            geom.models.add(propname='pore.seed',
+                            model=OpenPNM.Geometry.models.pore_misc.random)
+            assert geom.models._find_master() is geom
+            assert geom.models['pore.seed']._find_master() is geom
+            mod = pickle.loads(pickle.dumps(geom.models))
+            with pytest.raises(Exception):
+                mod._find_master()
+            geom.models = mod
+            assert geom.models._find_master() is geom
+            assert geom.models['pore.seed']._find_master() is geom
+            geom.regenerate()
@@ -71,6 +71,12 @@ class GenericNetworkTest:
                                          excl_self=False)
         assert sp.all(a == [0, 2, 3, 10, 12, 100, 102])
 
+    def test_find_neighbor_pores_not_flattened_order(self):
+        a = self.net.find_neighbor_pores(pores=[2, 0, 999], flatten=False)
+        assert sp.all(a[0] == [1, 3, 12, 102])
+        assert sp.all(a[1] == [1, 10, 100])
+        assert sp.all(a[2] == [899, 989, 998])
+
     def test_find_neighbor_throats_empty(self):
         a = self.net.find_neighbor_throats(pores=[])
         assert sp.size(a) == 0
@@ -48,7 +48,7 @@ class MultiPhaseTest:
         self.phase['pore.occupancy'][[19, 25]] = 0
         self.phase['pore.occupancy'][6] = 0
         t1 = self.net.Ts[self.phase['throat.occupancy'] == 0.]
-        t2 = self.net.find_connecting_throat(6, 7)[0]
+        t2 = self.net.find_connecting_throat(6, 7)
         t3 = self.net.Ts[~sp.in1d(self.net.Ts, sp.concatenate((t1, t2)))]
         self.phys1.models.add(propname='throat.cond_conductance',
                               throat_conductance='throat.diffusive_conductance',
@@ -1,6 +1,7 @@
 import OpenPNM
 import OpenPNM.Utilities.misc as misc
 import scipy as sp
+import scipy.sparse.csgraph as spgr
 import time
 
 
@@ -53,3 +54,47 @@ class UtilitiesMiscTest:
         pts = sp.hstack([pts1, pts2])
         check = misc.iscoplanar(coords=net['pore.coords'][pts])
         assert check
+
+    def test_path_length_statistics(self):
+        net = OpenPNM.Network.Cubic(shape=[4, 3, 2])
+        w = sp.rand(net.Nt)
+        g = net.create_adjacency_matrix(data=w, sprsfmt='csr')
+        d = spgr.dijkstra(g, directed=False)
+        d = d[d > 0]
+        stats = misc.path_length_statistics(network=net, weights=w,
+                                            chunk_size=5)
+        assert stats['count'] == sp.size(d)
+        assert sp.isclose(stats['mean'], sp.mean(d))
+        assert sp.isclose(stats['std'], sp.std(d))
+        assert sp.isclose(stats['min'], sp.amin(d))
+        assert sp.isclose(stats['max'], sp.amax(d))
+        assert sp.sum(stats['counts']) == sp.size(d)
+        stats2 = misc.path_length_statistics(network=net, weights=w,
+                                             chunk_size=7, processes=2)
+        assert stats2['count'] == stats['count']
+        assert sp.isclose(stats2['mean'], stats['mean'])
+        assert sp.all(stats2['counts'] == stats['counts'])
+        # Lengths outside the given range are counted in the edge bins
+        stats3 = misc.path_length_statistics(network=net, weights=w,
+                                             bins=4, bin_range=(0.5, 1.0))
+        assert sp.sum(stats3['counts']) == stats['count']
+        assert stats3['counts'][0] >= sp.sum(d <= 0.5)
+        assert not hasattr(misc, '_path_graph')
+
+    def test_merge_moments(self):
+        x = 1e9 + sp.rand(100)
+        m = (0, 0.0, 0.0)
+        for i in range(0, 100, 7):
+            m = misc._merge_moments(m, misc._moments(x[i:i + 7]))
+        assert m[0] == 100
+        assert sp.isclose(m[1], sp.mean(x))
+        assert sp.isclose(sp.sqrt(m[2] / m[0]), sp.std(x))
+
+    def test_path_length_statistics_disconnected(self):
+        net = OpenPNM.Network.Cubic(shape=[3, 3, 1])
+        net.trim(throats=net.find_neighbor_throats(pores=[0]))
+        stats = misc.path_length_statistics(network=net, sources=[0])
+        assert stats['count'] == 0
+        assert sp.isnan(stats['mean'])
+        stats = misc.path_length_statistics(network=net, sources=[1, 2])
+        assert stats['count'] == 14